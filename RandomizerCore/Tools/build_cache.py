@@ -0,0 +1,57 @@
+from pathlib import Path
+import hashlib, json
+
+CACHE_VERSION = 2 # bump whenever the output of a file changes without any of its inputs changing
+
+
+class BuildCache:
+    """Remembers the inputs that each output file of a seed folder was built from
+
+    Files whose inputs have not changed since the last run are kept instead of being built again
+    Only files in subfolders are tracked, files directly in the seed folder like logs are left alone
+    Keys are always checked against the seed folder itself, even while the new output is being staged elsewhere"""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.path = root / 'build.json'
+        self.previous = {}
+        self.current = {}
+        if self.path.is_file():
+            try:
+                with open(self.path, 'r') as f:
+                    self.previous = json.load(f)
+            except (OSError, ValueError):
+                self.previous = {}
+
+
+    @staticmethod
+    def key(*inputs) -> str:
+        """Returns a hash of everything an output file depends on. Inputs must be JSON serializable"""
+
+        data = json.dumps([CACHE_VERSION, *inputs], sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+    @staticmethod
+    def stamp(file: Path) -> list:
+        """Returns the size and modification time of a vanilla file, which change whenever the file is replaced"""
+
+        stat = file.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+
+    def reuse(self, file: Path, key: str) -> bool:
+        """Records the key for a file and returns True if the file from the last run was built from the same inputs
+
+        If False is returned, the file is expected to be written before the keys are saved"""
+
+        name = file.relative_to(self.root).as_posix()
+        self.current[name] = key
+        return self.previous.get(name) == key and file.is_file()
+
+
+    def save(self, path: Path) -> None:
+        """Saves the keys of this run for the next one. Files that were not part of this run are no longer tracked"""
+
+        with open(path, 'w') as f:
+            json.dump(self.current, f, indent=4)
@@ -1,5 +1,9 @@
+import RandomizerCore.Tools.zs_tools as zs_tools
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from io import BytesIO
-import evfl
+import evfl, os
 
 def invertList(l):
 	"""Converts a list into a dict of {value: index} pairs"""
@@ -20,9 +24,7 @@ def writeFlow(flow):
 
 	with BytesIO() as f:
 		flow.write(f)
-		f.seek(0)
-		data = f.read()
-	return data
+		return f.getvalue() # hands over the buffer of the BytesIO rather than copying it
 
 
 def findEvent(flowchart, name):
@@ -69,3 +71,125 @@ def insertEventAfter(flowchart, previous, new):
 		return True
 
 	return False
+
+
+class IndexedFlowchart:
+	"""Wraps a flowchart with name lookups for events and entry points and the index of every event
+
+	The lookups are kept up to date as events are added, so each edit costs the same no matter how big the flowchart is
+	Edits made inside a batch only resolve their event indices once, when the batch ends"""
+
+	def __init__(self, flowchart):
+		self.flowchart = flowchart
+		self.events = {event.name: event for event in flowchart.events}
+		self.entry_points = {ep.name: ep for ep in flowchart.entry_points}
+		self.indices = invertList(flowchart.events)
+		self.pending = None
+
+
+	def findEvent(self, name):
+		"""Returns an event given its name, or None if not found"""
+
+		return self.events.get(name)
+
+
+	def findEntryPoint(self, name):
+		"""Returns an entry point given its name, or None if not found"""
+
+		return self.entry_points.get(name)
+
+
+	def addEvent(self, event):
+		"""Adds a new event to the end of the flowchart"""
+
+		self.indices[event] = len(self.flowchart.events)
+		self.flowchart.events.append(event)
+		self.events[event.name] = event
+
+
+	def insertEventAfter(self, previous, new):
+		"""Change the previous event or entry point to have {new} be the next event 
+		{previous} is the name of the event/entry point, {new} is the name of the event to add 
+		Return True if any event or entry point was modified and False if not"""
+
+		newEvent = self.findEvent(new)
+
+		prevEvent = self.findEvent(previous)
+		if prevEvent:
+			self.link(prevEvent.data.nxt, newEvent)
+			return True
+
+		entry_point = self.findEntryPoint(previous)
+		if entry_point:
+			self.link(entry_point.main_event, newEvent)
+			return True
+
+		return False
+
+
+	def link(self, ref, event):
+		"""Points an event reference at an event, resolving its index now or at the end of the current batch"""
+
+		ref.v = event
+		if self.pending is None:
+			ref.set_index(self.indices)
+		else:
+			self.pending.append(ref)
+
+
+	@contextmanager
+	def batch(self):
+		"""Groups many edits together, so all of their indices are resolved in a single pass at the end
+
+		The flowchart should not be written with writeFlow until the batch has ended"""
+
+		self.pending = []
+		try:
+			yield self
+		finally:
+			pending = self.pending
+			self.pending = None
+			for ref in pending:
+				ref.set_index(self.indices)
+
+
+def editFlow(name, data, edit):
+	"""Parses a flow, passes it to the edit function, and returns it as bytes along with the name it was given
+
+	This runs in worker processes, so the edit function has to be picklable, like a module level function or a partial of one"""
+
+	flow = readFlow(data)
+	edit(flow)
+	return name, writeFlow(flow)
+
+
+def editFlows(sarc, edits, workers=None):
+	"""Edits many flows of an archive at once, then writes them back into the archive
+
+	Parameters
+	----------
+	sarc : SARC | RawSARC
+		The archive from zs_tools that holds the flows
+	edits : dict
+		{file name in the archive: function that takes the EventFlow and edits it in place}
+	workers : int | None
+		The number of worker processes to use, defaulting to the CPU count. Flows are edited serially if this is 1
+	"""
+
+	files = sarc.writer.files if isinstance(sarc, zs_tools.SARC) else sarc.files
+
+	# readFlow makes the only copy of each flow that evfl needs, so serial edits read straight from the archive
+	# workers are sent a copy instead, since the archive's own buffers cannot be pickled
+	results = None
+	workers = min(workers or os.cpu_count() or 1, len(edits))
+	if workers > 1:
+		try:
+			with ProcessPoolExecutor(max_workers=workers) as pool:
+				results = list(pool.map(editFlow, edits, (bytes(files[name]) for name in edits), edits.values()))
+		except (OSError, NotImplementedError, BrokenProcessPool):
+			print('Could not start flow workers, falling back to serial editing')
+	if results is None:
+		results = [editFlow(name, files[name], edit) for name,edit in edits.items()]
+
+	for name, data in results:
+		files[name] = data
@@ -0,0 +1,94 @@
+"""Identifies game dumps by hashing the packs the randomizer reads
+
+Run this module with the path of a RomFS to print its fingerprint, for adding a confirmed dump to KnownDumps.yml"""
+
+from randomizer_paths import DATA_PATH
+from pathlib import Path
+import hashlib, sys
+
+FINGERPRINT_PACKS = ('Mush.release.pack', 'Map.pack') # the vanilla packs the randomizer reads from
+CHUNK_SIZE = 4 * 1024 * 1024 # large reads let hashlib release the GIL, so the packs are hashed in parallel
+
+_fingerprints = {} # {(pack, size, mtime): digest}, so unchanged packs are only hashed once per session
+
+
+def hashFile(file: Path) -> bytes:
+    """Returns the BLAKE2b digest of a file, read in large chunks"""
+
+    stat = file.stat()
+    stamp = (str(file.resolve()), stat.st_size, stat.st_mtime_ns)
+    if stamp in _fingerprints:
+        return _fingerprints[stamp]
+
+    digest = hashlib.blake2b(digest_size=32)
+    with open(file, 'rb', buffering=0) as f:
+        buffer = bytearray(CHUNK_SIZE)
+        view = memoryview(buffer)
+        while size := f.readinto(buffer):
+            digest.update(view[:size])
+
+    _fingerprints[stamp] = digest.digest()
+    return _fingerprints[stamp]
+
+
+def fingerprint(romfs: Path) -> str:
+    """Returns a hash of the contents of every pack the randomizer uses, which identifies the game dump
+
+    Raises FileNotFoundError if any of the packs are missing"""
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    files = [romfs / 'Pack' / pack for pack in FINGERPRINT_PACKS]
+    with ThreadPoolExecutor(len(files)) as pool:
+        digests = list(pool.map(hashFile, files))
+
+    combined = hashlib.blake2b(digest_size=32)
+    for pack, digest in zip(FINGERPRINT_PACKS, digests):
+        combined.update(pack.encode('utf-8'))
+        combined.update(digest)
+    return combined.hexdigest()
+
+
+def knownDumps() -> dict:
+    """Returns the confirmed dumps from KnownDumps.yml as {fingerprint: {'Version': str, 'Region': str}}"""
+
+    import yaml
+
+    with open(DATA_PATH / 'KnownDumps.yml', 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
+def identify(romfs: Path) -> dict:
+    """Returns the version and region of a game dump, looked up by its fingerprint in KnownDumps.yml
+
+    Only dumps that have been confirmed are listed, so both values are None for any other dump
+    The packs are not hashed at all while the table is empty"""
+
+    info = {'Fingerprint': None, 'Version': None, 'Region': None}
+
+    known = knownDumps()
+    if not known:
+        return info
+
+    info['Fingerprint'] = fingerprint(romfs)
+    info.update(known.get(info['Fingerprint'], {}))
+    return info
+
+
+def regionWarning(romfs: Path, region: str) -> str:
+    """Returns a warning if the game dump is known to be from a different region than the one selected, otherwise an empty string
+
+    This can take a moment the first time a dump is checked, so the GUI calls it from a background thread"""
+
+    try:
+        info = identify(romfs)
+    except OSError:
+        return ''
+    if info['Region'] is None or info['Region'] == region:
+        return ''
+    version = f" {info['Version']}" if info['Version'] else ''
+    return f"This RomFS looks like the {info['Region']}{version} version of the game, but the {region} region is selected"
+
+
+if __name__ == '__main__':
+    print(fingerprint(Path(sys.argv[1])))
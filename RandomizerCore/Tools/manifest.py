@@ -0,0 +1,91 @@
+from RandomizerCore.Tools.fingerprint import fingerprint, hashFile
+from pathlib import Path
+import hashlib, json, platform
+
+MANIFEST_FILE = 'manifest.json' # written directly in the seed folder, next to the spoiler log
+LIBRARIES = ('oead', 'pycryptodome', 'PyYAML') # the packages that the output files depend on
+
+
+def newDigest():
+    """Returns the hash used for output files, which is the same BLAKE2b that the game dump fingerprint uses"""
+
+    return hashlib.blake2b(digest_size=32)
+
+
+def versions(randomizer: str) -> dict:
+    """Returns the versions of the randomizer, Python, and every library that shapes the output
+
+    Libraries are None if their version cannot be found, like in some frozen builds"""
+
+    from importlib import metadata
+
+    found = {'Randomizer': randomizer, 'Python': platform.python_version()}
+    for library in LIBRARIES:
+        try:
+            found[library] = metadata.version(library)
+        except metadata.PackageNotFoundError:
+            found[library] = None
+    return found
+
+
+def makeManifest(seed: str, settings: dict, romfs: Path, randomizer: str, files: dict) -> dict:
+    """Returns the manifest of a seed folder
+
+    Parameters
+    ----------
+    seed : str
+        The seed of the run
+    settings : dict
+        The settings of the run, without the paths
+    romfs : Path
+        The game dump the run was made from, which is only stored as its fingerprint
+    randomizer : str
+        The version of the randomizer
+    files : dict
+        {path relative to the seed folder: hex digest} of every output file
+    """
+
+    return {
+        'seed': seed,
+        'settings': settings,
+        'romfs': fingerprint(romfs),
+        'versions': versions(randomizer),
+        'files': dict(sorted(files.items())),
+    }
+
+
+def fileDigest(file: Path) -> str:
+    return hashFile(file).hex()
+
+
+def loadManifest(path: Path) -> dict:
+    """Returns the manifest at the path, or an empty dict if there is none or it cannot be read"""
+
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def saveManifest(manifest: dict, path: Path) -> None:
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=4, default=str)
+
+
+def compareManifests(expected: dict, actual: dict) -> list:
+    """Returns a line for every file that is missing, extra, or different in the actual manifest
+
+    Only the files are compared, since settings like the number of workers and the versions may differ between machines"""
+
+    expected = expected.get('files', {})
+    actual = actual.get('files', {})
+    differences = []
+    for name in sorted(expected.keys() | actual.keys()):
+        if name not in actual:
+            differences.append(f"missing {name}")
+        elif name not in expected:
+            differences.append(f"extra {name}")
+        elif expected[name] != actual[name]:
+            differences.append(f"changed {name}")
+    return differences
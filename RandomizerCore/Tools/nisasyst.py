@@ -1,7 +1,7 @@
 # modified from SciresM's script found here
 # https://gist.github.com/SciresM/dba70bc2ee7eca11e1bd777ecb58ff16
 
-import zlib
+import functools, zlib
 from Crypto.Cipher import AES
 
 def u32(x):
@@ -30,22 +30,53 @@ class sead_rand:
         return c
 
 
+@functools.lru_cache(maxsize=None)
+def getKeyIV(fn):
+    """Derives the AES key and IV for a file, which only depend on its name within the pack"""
+
+    rnd = sead_rand(u32(zlib.crc32(bytes(fn, 'utf-8'))))
+    key_iv = bytes.fromhex(''.join(KEY_MATERIAL[rnd.get_u32() >> 24] for _ in range(0x40)))
+    return key_iv[:0x10], key_iv[0x10:]
+
+
 class NisasystContainer:
     def __init__(self, fn, data):
+        data = memoryview(data)
         if data[-8:] != b'nisasyst':
             raise ValueError('Error: Input appears not to be an encrypted Splatoon 2 archive!')
-        seed = u32(zlib.crc32(bytes(fn, 'utf-8')))
-        key_iv = ''
-        rnd = sead_rand(seed)
-        for _ in range(0x40):
-            key_iv += KEY_MATERIAL[(rnd.get_u32() >> 24)]
-        key_iv = bytes.fromhex(key_iv)
-        self.key, self.iv = key_iv[:0x10], key_iv[0x10:]
-        self.data = AES.new(self.key, AES.MODE_CBC, self.iv).decrypt(data[:-8])
+        self.key, self.iv = getKeyIV(fn)
+        self.data = bytearray(len(data) - 8)
+        AES.new(self.key, AES.MODE_CBC, self.iv).decrypt(data[:-8], output=self.data)
+
+    @classmethod
+    def fromDecrypted(cls, fn, data):
+        """Makes a container from data that was already decrypted, so that it can still be repacked"""
+
+        container = cls.__new__(cls)
+        container.key, container.iv = getKeyIV(fn)
+        container.data = bytearray(data)
+        return container
 
     def repack(self):
-        while (len(self.data) % 16) != 0:
-            self.data += b'\x00'
-        result = AES.new(self.key, AES.MODE_CBC, self.iv).encrypt(self.data)
-        result += b'nisasyst'
+        # pad and encrypt in place within a single buffer that already has room for the footer
+        size = (len(self.data) + 15) & ~15
+        result = bytearray(size + 8)
+        result[:len(self.data)] = self.data
+        view = memoryview(result)[:size]
+        AES.new(self.key, AES.MODE_CBC, self.iv).encrypt(view, output=view)
+        result[size:] = b'nisasyst'
         return result
+
+
+def decryptAll(files):
+    """Decrypts every nisasyst wrapped file from a dict of {name: data}, returning the containers by name"""
+
+    return {name: NisasystContainer(name, data) for name, data in files.items()
+            if data[-8:] == b'nisasyst'}
+
+
+def encryptAll(files, containers):
+    """Encrypts every container again and writes the results back into the dict of {name: data}"""
+
+    for name, container in containers.items():
+        files[name] = container.repack()
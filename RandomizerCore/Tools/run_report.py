@@ -0,0 +1,137 @@
+from contextlib import contextmanager
+import json, sys, threading, time
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+TOP_ALLOCATIONS = 5 # number of allocation sites listed for each outermost phase when tracing memory
+
+
+def peakRSS() -> int:
+    """Returns the peak resident memory of this process so far in bytes, or 0 where it cannot be read"""
+
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024 # macOS reports bytes, everything else KiB
+    if sys.platform == 'win32':
+        return peakWorkingSet()
+    return 0
+
+
+def peakWorkingSet() -> int:
+    """Returns the peak working set of this process in bytes, which is what Windows calls its resident memory"""
+
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + \
+            [(name, ctypes.c_size_t) for name in ('PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+    kernel32 = ctypes.WinDLL('kernel32')
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi = ctypes.WinDLL('psapi')
+    psapi.GetProcessMemoryInfo.argtypes = (wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD)
+    psapi.GetProcessMemoryInfo.restype = wintypes.BOOL
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return 0
+    return counters.PeakWorkingSetSize
+
+
+class RunReport:
+    """Records the wall time, CPU time, and bytes read and written of each phase of a randomizer run
+
+    CPU time is measured per thread, so it only counts the work of the thread or worker process that ran the phase
+    Each phase also records the peak RSS of its process so far. If trace_memory is set and tracemalloc is tracing, phases run
+    on the bound thread also record the peak of traced memory, and the outermost ones their top allocation sites
+    The thread that made the report is bound until bind is called from another one, like the thread that does the run"""
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.phases = []
+        self.start = time.perf_counter()
+        self.trace_memory = trace_memory
+        self.thread = threading.get_ident()
+        self.traced_peaks = [] # the highest traced peak seen so far by each open phase, innermost last
+
+
+    @contextmanager
+    def phase(self, name: str, file: str = '', bytes_read: int = 0):
+        """Times the code inside the with block as a phase
+
+        The phase dict is given to the with block so that byte counts only known afterwards can be filled in"""
+
+        phase = {'name': name, 'file': file, 'bytes_read': bytes_read, 'bytes_written': 0}
+        tracing = self.tracing()
+        if tracing:
+            import tracemalloc
+            # the traced peak can only be reset, so the outer phases keep the peak they had reached so far
+            if self.traced_peaks:
+                self.traced_peaks[-1] = max(self.traced_peaks[-1], tracemalloc.get_traced_memory()[1])
+            self.traced_peaks.append(0)
+            snapshot = tracemalloc.take_snapshot() if len(self.traced_peaks) == 1 else None
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield phase
+        finally:
+            phase['wall'] = time.perf_counter() - wall
+            phase['cpu'] = time.thread_time() - cpu
+            phase['peak_rss'] = peakRSS()
+            if tracing:
+                phase['traced_peak'] = max(self.traced_peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self.traced_peaks:
+                    self.traced_peaks[-1] = max(self.traced_peaks[-1], phase['traced_peak'])
+                if snapshot is not None:
+                    stats = tracemalloc.take_snapshot().compare_to(snapshot, 'lineno')
+                    phase['top_allocations'] = [str(stat) for stat in stats[:TOP_ALLOCATIONS]]
+            self.phases.append(phase)
+
+
+    def bind(self) -> None:
+        """Traces memory for phases on the calling thread from now on, instead of the thread the report was made on"""
+
+        self.thread = threading.get_ident()
+
+
+    def tracing(self) -> bool:
+        """Returns whether traced memory should be recorded for a phase starting now"""
+
+        if not self.trace_memory or threading.get_ident() != self.thread:
+            return False
+        import tracemalloc
+        return tracemalloc.is_tracing()
+
+
+    def extend(self, phases: list) -> None:
+        """Adds phases that were recorded somewhere else, like in a worker process"""
+
+        self.phases.extend(phases)
+
+
+    def toDict(self) -> dict:
+        """Returns the report as plain data, with totals for each kind of phase
+
+        Times and byte counts are summed, while memory peaks are the highest of any phase of that kind"""
+
+        totals = {}
+        for phase in self.phases:
+            total = totals.setdefault(phase['name'], {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'bytes_read': 0, 'bytes_written': 0})
+            total['count'] += 1
+            for key in ('wall', 'cpu', 'bytes_read', 'bytes_written'):
+                total[key] += phase[key]
+            for key in ('peak_rss', 'traced_peak'):
+                if key in phase:
+                    total[key] = max(total.get(key, 0), phase[key])
+        return {'wall': time.perf_counter() - self.start, 'peak_rss': peakRSS(), 'totals': totals, 'phases': self.phases}
+
+
+    def save(self, path) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.toDict(), f, indent=4)
@@ -0,0 +1,176 @@
+from RandomizerCore.Tools.run_report import RunReport
+from RandomizerCore.Tools.manifest import newDigest
+from pathlib import Path
+from typing import TYPE_CHECKING
+import os, queue, shutil, threading, uuid
+
+if TYPE_CHECKING:
+    import RandomizerCore.Tools.zs_tools as zs_tools
+
+_removals = [] # background removal threads that may still be running
+
+
+class StagedOutput:
+    """Builds a seed folder next to the real one and only swaps it into place once the run has succeeded
+
+    Files are written by a background thread, so disk I/O overlaps with whatever the run does next
+    Each file is hashed as it is written, so the manifest never has to read the files back
+    A cancelled or failed run only ever leaves its staging folder behind, which is removed in the background"""
+
+    def __init__(self, root: Path, report: RunReport) -> None:
+        # every run gets its own names, so folders still being removed in the background never clash with it
+        self.root = root
+        self.prefix = f".{root.name}."
+        run_id = uuid.uuid4().hex[:8]
+        self.stage = root.with_name(f"{self.prefix}staging-{run_id}")
+        self.trash = root.with_name(f"{self.prefix}old-{run_id}")
+        self.report = report
+        self.queue = queue.Queue()
+        self.writer = None
+        self.errors = []
+        self.cancelled = False
+        self.digests = {} # {name: hex digest} of every file written so far
+
+
+    def write(self, name: str, data: 'bytes | zs_tools.RawSARC') -> None:
+        """Queues a file to be written to the staging folder
+
+        Parameters
+        ----------
+        name : str
+            The path of the file, relative to the seed folder
+        data : bytes | RawSARC
+            The data to write. An archive is kept open until it has been streamed to the file
+        """
+
+        if self.writer is None:
+            # anything left over from a run that crashed or exited before its cleanup finished is removed first
+            if self.root.parent.is_dir():
+                for folder in self.root.parent.iterdir():
+                    if folder.name.startswith(self.prefix) and folder != self.stage:
+                        removeInBackground(folder)
+            self.writer = threading.Thread(target=self.writeQueued, daemon=True)
+            self.writer.start()
+
+        # archives are told apart by their chunks method, so oead is never imported just to write files
+        if hasattr(data, 'chunks'):
+            data.retain()
+        self.queue.put((name, data))
+
+
+    def writeQueued(self) -> None:
+        """Runs on the writer thread, writing each queued file in order"""
+
+        while True:
+            name, data = self.queue.get()
+            try:
+                if name is None:
+                    return
+                if self.errors or self.cancelled: # the run has already ended, so the remaining files are skipped
+                    continue
+                with self.report.phase('write', name) as phase:
+                    file = self.stage / name
+                    file.parent.mkdir(parents=True, exist_ok=True)
+                    digest = newDigest()
+                    with open(file, 'wb') as f:
+                        chunks = data.chunks() if hasattr(data, 'chunks') else (data,)
+                        for chunk in chunks:
+                            if self.cancelled: # the partial file goes away with the staging folder
+                                break
+                            f.write(chunk)
+                            digest.update(chunk)
+                        phase['bytes_written'] = f.tell()
+                    self.digests[name] = digest.hexdigest()
+            except Exception as e:
+                self.errors.append(e)
+            finally:
+                if hasattr(data, 'chunks'):
+                    data.close()
+                self.queue.task_done()
+
+
+    def flush(self) -> None:
+        """Waits for every queued file to be written, raising the first error the writer ran into"""
+
+        if self.writer is not None:
+            self.queue.join()
+        if self.errors:
+            raise self.errors[0]
+
+
+    def commit(self, keep=None) -> None:
+        """Swaps the staging folder into place as the seed folder, then removes the old one in the background
+
+        Nothing is swapped if the output was cancelled, since files may have been cut short
+
+        Parameters
+        ----------
+        keep : iterable | None
+            The paths of files in subfolders of the old seed folder that this run reused instead of writing again
+            Files directly in the seed folder, like logs, are always kept. If None, every old file is kept
+        """
+
+        self.flush()
+        if self.cancelled:
+            return
+        self.stage.mkdir(parents=True, exist_ok=True)
+
+        # the old folder is moved aside first, so a failed swap never leaves it half emptied
+        # reused files are then moved rather than copied, since both folders are always on the same drive
+        if self.root.is_dir():
+            os.replace(self.root, self.trash)
+            keep = None if keep is None else set(keep)
+            for file in list(self.trash.rglob('*')):
+                name = file.relative_to(self.trash).as_posix()
+                if not file.is_file() or (self.stage / name).exists():
+                    continue
+                if keep is None or file.parent == self.trash or name in keep:
+                    (self.stage / name).parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(file, self.stage / name)
+
+        os.replace(self.stage, self.root)
+        self.close()
+        removeInBackground(self.trash)
+
+
+    def cancel(self) -> None:
+        """Stops writing as soon as possible. This is safe to call from any thread"""
+
+        self.cancelled = True
+
+
+    def discard(self) -> None:
+        """Drops everything this run wrote, leaving the old seed folder as it was"""
+
+        self.cancel()
+        self.close()
+        removeInBackground(self.stage)
+
+
+    def close(self) -> None:
+        """Stops the writer thread once it is done with the queue"""
+
+        if self.writer is not None:
+            self.queue.put((None, None))
+            self.writer.join()
+            self.writer = None
+
+
+def removeInBackground(folder: Path) -> None:
+    """Deletes a folder on a background thread, so large seed folders never hold up the run or the UI
+
+    The threads are not daemons, so the interpreter waits for them before exiting"""
+
+    if folder.exists():
+        thread = threading.Thread(target=shutil.rmtree, args=(folder,), kwargs={'ignore_errors': True})
+        thread.start()
+        _removals.append(thread)
+
+
+def waitForRemovals() -> None:
+    """Blocks until every background removal has finished
+
+    Processes that may be ended without a normal exit, like pool workers, call this before returning their results"""
+
+    while _removals:
+        _removals.pop().join()
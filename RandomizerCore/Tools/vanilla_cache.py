@@ -0,0 +1,148 @@
+from RandomizerCore.Tools.fingerprint import fingerprint
+from pathlib import Path
+import os, shutil
+
+CACHE_VERSION = 1 # bump whenever the way files are decoded changes, so older entries are never used
+MAX_CACHE_SIZE = 1024 * 1024 * 1024 # default size cap in bytes for all dumps together
+
+
+class VanillaCache:
+    """Keeps decrypted and decompressed copies of vanilla files on disk, so each one is only decoded once per game dump
+
+    Every dump gets its own folder named after its fingerprint, holding each decoded file as is so it loads with one read
+    When the cache grows past its size cap, the folders of the least recently used dumps are removed first
+    With in_memory, decoded files are also kept in memory, so runs that share the cache never read them twice
+    The dump is only fingerprinted on first use, since that reads every pack in full"""
+
+    def __init__(self, romfs: Path, root: Path, max_size: int = MAX_CACHE_SIZE, enabled: bool = True, in_memory: bool = False) -> None:
+        self.romfs = romfs
+        self.root = root
+        self.max_size = max_size
+        self.enabled = enabled
+        self.memory = {} if in_memory else None
+        self.path = None
+
+
+    def ready(self) -> bool:
+        """Finds the folder of this dump the first time it is called, and returns whether the disk cache can be used
+
+        The disk cache is turned off if the dump cannot be fingerprinted or the folder cannot be made"""
+
+        if self.enabled and self.path is None:
+            try:
+                self.path = self.root / f"v{CACHE_VERSION}-{fingerprint(self.romfs)[:32]}"
+                self.path.mkdir(parents=True, exist_ok=True)
+                os.utime(self.path) # marks this dump as the most recently used
+            except OSError:
+                self.enabled = False
+        return self.enabled
+
+
+    def get(self, name: str, decode) -> bytes:
+        """Returns the decoded data of a vanilla file, only calling decode if it is not already cached
+
+        Parameters
+        ----------
+        name : str
+            The path of the file within its pack
+        decode : function
+            Takes no arguments and returns the decoded data, used to fill the cache
+        """
+
+        if self.memory is None:
+            return self.read(name, decode)
+        if name not in self.memory:
+            self.memory[name] = self.read(name, decode)
+        return self.memory[name]
+
+
+    def read(self, name: str, decode) -> bytes:
+        """Returns the decoded data of a vanilla file from disk, decoding and storing it first if needed"""
+
+        if not self.ready():
+            return decode()
+
+        file = self.entry(name)
+        data = readEntry(file)
+        if data is None:
+            data = decode()
+            self.store(file, data)
+        return data
+
+
+    def entry(self, name: str) -> Path | None:
+        """Returns the file that holds the decoded data of a vanilla file, or None if the disk cache is off
+
+        Worker processes use this to read and fill the cache themselves with readEntry and writeEntry"""
+
+        if not self.ready():
+            return None
+        return self.path / name.replace('/', '__')
+
+
+    def store(self, file: Path, data) -> None:
+        """Writes a new entry and evicts old dumps if needed. A cache that cannot be written is simply skipped"""
+
+        try:
+            if self.evict(len(data)):
+                writeEntry(file, data)
+        except OSError as e:
+            print('Could not write to the vanilla cache:', e)
+
+
+    def trim(self) -> None:
+        """Evicts old dumps if entries written by worker processes have pushed the cache past its size cap"""
+
+        if not self.ready():
+            return
+        try:
+            self.evict(0)
+        except OSError as e:
+            print('Could not trim the vanilla cache:', e)
+
+
+    def evict(self, new_size: int) -> bool:
+        """Removes the least recently used dumps until new_size more bytes fit under the cap
+
+        Returns False if the entry would not fit even with every other dump removed"""
+
+        folders = []
+        total = new_size
+        for folder in self.root.iterdir():
+            if not folder.is_dir():
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(folder) if entry.is_file())
+            total += size
+            if folder != self.path:
+                folders.append((folder.stat().st_mtime, size, folder))
+
+        for _, size, folder in sorted(folders):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(folder, ignore_errors=True)
+            total -= size
+        return total <= self.max_size
+
+
+def readEntry(file: Path | None) -> bytes | None:
+    """Returns the data of a cache entry, or None if there is no entry or it cannot be read"""
+
+    if file is None:
+        return None
+    try:
+        return file.read_bytes()
+    except OSError:
+        return None
+
+
+def writeEntry(file: Path, data) -> None:
+    """Writes a cache entry without checking the size cap. A cache that cannot be written is simply skipped"""
+
+    # written under a unique name first, so other processes never read a partial file
+    temp = file.with_name(f"{file.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, file)
+    except OSError as e:
+        print('Could not write to the vanilla cache:', e)
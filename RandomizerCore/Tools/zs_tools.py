@@ -1,33 +1,60 @@
-import zstandard
 import oead
+import mmap, struct, threading
 
-def zs_compress(data):
-	return oead.yaz0.compress(data)
+# name: oead compression level, or None to skip matching entirely
+COMPRESSION_PROFILES = {
+	'store': None,
+	'fast': 6,
+	'default': 7,
+	'max': 9,
+}
+
+def zs_compress(data, profile='default'):
+	level = COMPRESSION_PROFILES[profile]
+	if level is None:
+		return yaz0_store(data)
+	return oead.yaz0.compress(data, 0, level)
+
+def yaz0_store(data):
+	"""Returns a valid Yaz0 stream where every group is 8 literal bytes, trading file size for almost no cost"""
+
+	data = bytes(data)
+	size = len(data)
+	out = bytearray(size + (size + 7) // 8)
+	out[0::9] = b'\xff' * ((size + 7) // 8)
+	for i in range(8):
+		out[i + 1::9] = data[i::8]
+	return b'Yaz0' + struct.pack('>II', size, 0) + bytes(4) + out
 
 def zs_decompress(data):
 	return oead.yaz0.decompress(data)
 
 
 class SARC:
-	def __init__(self, data: bytes, compressed=False):
+	def __init__(self, data: bytes, compressed=False, profile='default', keep_reader=True):
 		self.compressed = compressed
+		self.profile = profile
 		if compressed:
-			self.reader = oead.Sarc(zs_decompress(data))
+			reader = oead.Sarc(zs_decompress(data))
 		else:
-			self.reader = oead.Sarc(data)
-		self.writer = oead.SarcWriter.from_sarc(self.reader)
+			reader = oead.Sarc(data)
+		self.writer = oead.SarcWriter.from_sarc(reader)
 		oead.SarcWriter.set_endianness(self.writer, oead.Endianness.Little) # Switch uses Little Endian
+
+		# the writer has its own copy of every file, so the reader and the data under it can be let go if they are not needed
+		self.reader = reader if keep_reader else None
 	
 	def repack(self):
 		if self.compressed:
-			return zs_compress(self.writer.write()[1])
+			return zs_compress(self.writer.write()[1], self.profile)
 		else:
 			return self.writer.write()[1]
 
 
 class BYAML:
-	def __init__(self, data, compressed=False):
+	def __init__(self, data, compressed=False, profile='default'):
 		self.compressed = compressed
+		self.profile = profile
 		if self.compressed:
 			data = oead.Bytes(zs_decompress(data))
 		self.info = oead.byml.from_binary(data)
@@ -35,5 +62,336 @@ class BYAML:
 	def repack(self):
 		data = oead.byml.to_binary(self.info, False, 3)
 		if self.compressed:
-			data = zs_compress(data)
+			data = zs_compress(data, self.profile)
+		return data
+
+
+class BYAMLPatch:
+	"""Appends values to arrays in the root of a binary BYAML file without parsing or rebuilding the rest of it
+
+	The new nodes, a grown copy of each edited array, and a grown copy of the string table are written to the end of the file
+	Only the header and the root entries that point at the edited arrays are changed, so the old copies are simply left unused
+	New strings are added to the end of the string table, since string values are only ever looked up by index
+	Keys cannot be added like this, because the key table has to stay sorted, so a KeyError is raised if one is missing"""
+
+	STRING = 0xA0
+	ARRAY = 0xC0
+	HASH = 0xC1
+	BOOL = 0xD0
+	INT = 0xD1
+	FLOAT = 0xD2
+	UINT = 0xD3
+	NULL = 0xFF
+
+	def __init__(self, data):
+		self.data = bytes(data)
+		if self.data[:2] == b'YB':
+			self.endian = '<'
+		elif self.data[:2] == b'BY':
+			self.endian = '>'
+		else:
+			raise ValueError('Input is not a BYAML file')
+		version, self.key_offset, self.string_offset, self.root_offset = struct.unpack_from(self.endian + 'HIII', self.data, 2)
+		if not 2 <= version <= 4: # every version in this range shares the same header and node layout
+			raise ValueError(f"Unsupported BYAML version: {version}")
+		if self.root_offset == 0 or self.nodeHeader(self.root_offset)[0] != self.HASH:
+			raise ValueError('BYAML root is not a hash')
+		self.appended = {}
+
+
+	def nodeHeader(self, offset):
+		"""Returns the type and entry count of the container node at offset"""
+
+		value = struct.unpack_from(self.endian + 'I', self.data, offset)[0]
+		if self.endian == '<':
+			return value & 0xFF, value >> 8
+		return value >> 24, value & 0xFFFFFF
+
+
+	def packNodeHeader(self, type, count):
+		return struct.pack(self.endian + 'I', type | count << 8 if self.endian == '<' else type << 24 | count)
+
+
+	def packHashEntry(self, key, type, value):
+		entry = key | type << 24 if self.endian == '<' else key << 8 | type
+		return struct.pack(self.endian + 'II', entry, value)
+
+
+	def tableString(self, offset, index):
+		start = offset + struct.unpack_from(self.endian + 'I', self.data, offset + 4 + index * 4)[0]
+		return self.data[start : self.data.index(b'\x00', start)]
+
+
+	def findString(self, offset, string):
+		"""Returns the index of a string in a sorted string table, or None if it is not there"""
+
+		if offset == 0:
+			return None
+		lo, hi = 0, self.nodeHeader(offset)[1]
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if self.tableString(offset, mid) < string:
+				lo = mid + 1
+			else:
+				hi = mid
+		if lo < self.nodeHeader(offset)[1] and self.tableString(offset, lo) == string:
+			return lo
+		return None
+
+
+	def rootEntry(self, key):
+		"""Returns the offset of the root hash entry for key"""
+
+		index = self.findString(self.key_offset, key.encode('utf-8'))
+		if index is not None:
+			for i in range(self.nodeHeader(self.root_offset)[1]):
+				entry = self.root_offset + 4 + i * 8
+				value = struct.unpack_from(self.endian + 'I', self.data, entry)[0]
+				if (value & 0xFFFFFF if self.endian == '<' else value >> 8) == index:
+					return entry
+		raise KeyError(key)
+
+
+	def append(self, key, value):
+		"""Queues a value to be added to the end of the array stored under key in the root hash"""
+
+		entry = self.rootEntry(key)
+		if self.data[entry + 3] != self.ARRAY: # the type is the last byte of the key index and type word in either endianness
+			raise ValueError(f"{key} is not an array")
+		self.appended.setdefault(entry, []).append(value)
+
+
+	def repack(self):
+		"""Returns the patched file. Raises KeyError if a value uses a key that the file does not already have"""
+
+		out = bytearray(self.data)
+		string_count = self.nodeHeader(self.string_offset)[1] if self.string_offset else 0
+		new_strings = {}
+
+		def write(node):
+			out.extend(bytes(align(len(out), 4) - len(out)))
+			offset = len(out)
+			out.extend(node)
+			return offset
+
+		def encode(value):
+			if isinstance(value, str):
+				string = value.encode('utf-8')
+				index = self.findString(self.string_offset, string)
+				if index is None:
+					index = new_strings.setdefault(string, string_count + len(new_strings))
+				return self.STRING, index
+			if isinstance(value, bool):
+				return self.BOOL, int(value)
+			if isinstance(value, oead.S32):
+				return self.INT, int(value) & 0xFFFFFFFF
+			if isinstance(value, oead.U32):
+				return self.UINT, int(value)
+			if isinstance(value, oead.F32):
+				return self.FLOAT, struct.unpack(self.endian + 'I', struct.pack(self.endian + 'f', float(value)))[0]
+			if value is None:
+				return self.NULL, 0
+			if isinstance(value, dict):
+				entries = []
+				for k, v in value.items():
+					index = self.findString(self.key_offset, k.encode('utf-8'))
+					if index is None:
+						raise KeyError(k)
+					entries.append((index, *encode(v)))
+				entries.sort()
+				return self.HASH, write(self.packNodeHeader(self.HASH, len(entries))
+							+ b''.join(self.packHashEntry(*entry) for entry in entries))
+			if isinstance(value, list):
+				return self.ARRAY, write(packArray([encode(v) for v in value]))
+			raise ValueError(f"Unsupported BYAML value: {value!r}")
+
+		def packArray(items, offset=None):
+			"""Packs an array node, keeping the types and values of the old array at offset in front of the new items"""
+
+			types = b''
+			values = b''
+			count = 0
+			if offset is not None:
+				count = self.nodeHeader(offset)[1]
+				types = self.data[offset + 4 : offset + 4 + count]
+				values_start = align(offset + 4 + count, 4)
+				values = self.data[values_start : values_start + count * 4]
+			types += bytes(type for type, _ in items)
+			values += b''.join(struct.pack(self.endian + 'I', value) for _, value in items)
+			count += len(items)
+			header = self.packNodeHeader(self.ARRAY, count) + types
+			return header + bytes(align(len(header), 4) - len(header)) + values
+
+		for entry, values in self.appended.items():
+			items = [encode(value) for value in values]
+			old_array = struct.unpack_from(self.endian + 'I', self.data, entry + 4)[0]
+			new_array = write(packArray(items, old_array))
+			struct.pack_into(self.endian + 'I', out, entry + 4, new_array)
+
+		if new_strings:
+			# the old strings are copied as one block, so only their offsets have to move to make room for the new ones
+			offsets = []
+			strings = b''
+			if string_count:
+				offsets = struct.unpack_from(self.endian + f"{string_count + 1}I", self.data, self.string_offset + 4)
+				strings = self.data[self.string_offset + offsets[0] : self.string_offset + offsets[-1]]
+				offsets = [offset + len(new_strings) * 4 for offset in offsets[:-1]]
+			cursor = 4 + (string_count + len(new_strings) + 1) * 4 + len(strings)
+			for string in new_strings:
+				offsets.append(cursor)
+				cursor += len(string) + 1
+			offsets.append(cursor)
+			table = self.packNodeHeader(0xC2, len(offsets) - 1) + struct.pack(self.endian + f"{len(offsets)}I", *offsets)
+			table += strings + b''.join(string + b'\x00' for string in new_strings)
+			struct.pack_into(self.endian + 'I', out, 8, write(table))
+
+		out.extend(bytes(align(len(out), 4) - len(out)))
+		return bytes(out)
+
+
+def align(offset, alignment):
+	return (offset + alignment - 1) & -alignment
+
+
+class RawSARC:
+	"""Reads the SARC header and file table directly and keeps every file as a view into the original data
+
+	Only the header and file table are rebuilt on repack, files that were not replaced are copied straight from the input
+	Files can be replaced but not added or removed, since the vanilla name table is reused"""
+
+	def __init__(self, data, file_map=None):
+		self.file_map = file_map
+		self.data = memoryview(data)
+		if self.data[:4] != b'SARC':
+			raise ValueError('Input is not a SARC archive')
+		self.endian = '<' if self.data[6:8] == b'\xff\xfe' else '>'
+		header_size, _, _, self.data_offset = struct.unpack_from(self.endian + 'HHII', self.data, 4)
+
+		# SFAT header followed by a (name hash, attributes, data start, data end) node for each file
+		node_count, self.hash_key = struct.unpack_from(self.endian + 'HI', self.data, header_size + 6)
+		nodes_offset = header_size + 0xC
+		self.nodes = list(struct.iter_unpack(self.endian + 'IIII', self.data[nodes_offset : nodes_offset + node_count * 0x10]))
+
+		# SFNT header followed by the null terminated names, each one aligned to 4 bytes
+		self.sfnt_offset = nodes_offset + node_count * 0x10
+		name_table = bytes(self.data[self.sfnt_offset + 8 : self.data_offset])
+		names_size = 0
+
+		self.names = []
+		self.alignments = []
+		self.files = {}
+		for name_hash, attributes, start, end in self.nodes:
+			name_offset = (attributes & 0xFFFF) * 4
+			name_end = name_table.index(b'\x00', name_offset)
+			names_size = max(names_size, align(name_end + 1, 4))
+			name = name_table[name_offset : name_end].decode('utf-8')
+			self.names.append(name)
+			self.files[name] = self.data[self.data_offset + start : self.data_offset + end]
+
+			# the alignment each file needs is not stored, so use the largest one its vanilla offset satisfies
+			offset = self.data_offset + start
+			self.alignments.append(min(offset & -offset, 0x2000))
+
+		self.sfnt = bytes(self.data[self.sfnt_offset : self.sfnt_offset + 8 + names_size])
+		self.views = list(self.files.values())
+		self.users = 1
+		self.lock = threading.Lock()
+
+
+	@classmethod
+	def fromFile(cls, path):
+		"""Memory maps the file instead of reading it, so only the pages that get used are ever loaded"""
+
+		with open(path, 'rb') as f:
+			file_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		return cls(file_map, file_map)
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, *args):
+		self.close()
+
+
+	def retain(self):
+		"""Keeps the archive open until close is called one more time, so another thread can finish using it"""
+
+		with self.lock:
+			self.users += 1
+		return self
+
+
+	def close(self):
+		"""Releases every view into the data and closes the memory map if there is one
+
+		If the archive was retained, it is only closed once every user has closed it
+		Views made from the files can outlive it, like ones held by the frames of an error that is being raised.
+		The memory map is then left to be closed once they are freed, so that the error is not replaced by a BufferError"""
+
+		with self.lock:
+			self.users -= 1
+			if self.users > 0:
+				return
+		for view in self.views:
+			view.release()
+		self.data.release()
+		if self.file_map is not None:
+			try:
+				self.file_map.close()
+			except BufferError:
+				pass
+
+
+	def read(self, name):
+		"""Returns the data of a file, which is only decompressed here if it is Yaz0 compressed"""
+
+		data = self.files[name]
+		if data[:4] == b'Yaz0':
+			return zs_decompress(data)
 		return data
+
+
+	def chunks(self):
+		"""Yields the repacked archive piece by piece, starting with the header and file table
+
+		Only the offsets of the files are worked out up front, so the full archive is never built in memory"""
+
+		if len(self.files) != len(self.names):
+			raise KeyError('Files can only be replaced in a RawSARC, not added')
+
+		names_end = self.sfnt_offset + len(self.sfnt)
+		data_offset = align(names_end, self.data_offset & -self.data_offset)
+
+		nodes = []
+		starts = []
+		cursor = data_offset
+		for node, name, alignment in zip(self.nodes, self.names, self.alignments):
+			size = len(self.files[name])
+			start = align(cursor, alignment)
+			nodes.append(struct.pack(self.endian + 'IIII', node[0], node[1], start - data_offset, start - data_offset + size))
+			starts.append(start)
+			cursor = start + size
+
+		yield struct.pack(self.endian + '4sHHIIHH', b'SARC', 0x14, 0xFEFF, cursor, data_offset, 0x100, 0)
+		yield struct.pack(self.endian + '4sHHI', b'SFAT', 0xC, len(self.nodes), self.hash_key)
+		yield b''.join(nodes)
+		yield self.sfnt
+
+		cursor = names_end
+		for name, start in zip(self.names, starts):
+			yield bytes(start - cursor)
+			yield self.files[name]
+			cursor = start + len(self.files[name])
+
+
+	def write(self, f):
+		"""Writes the repacked archive straight to an open file"""
+
+		for chunk in self.chunks():
+			f.write(chunk)
+
+
+	def repack(self):
+		return b''.join(self.chunks())
@@ -0,0 +1,658 @@
+"""The randomizer itself, kept free of Qt so it can run headless
+
+oead, yaml, and the crypto and multiprocessing modules are slow to import, so they are only imported by the stages that use them"""
+
+from RandomizerCore.Tools.run_report import RunReport
+from RandomizerCore.Tools.build_cache import BuildCache
+from RandomizerCore.Tools.vanilla_cache import VanillaCache
+from RandomizerCore.Tools.staged_output import StagedOutput
+import RandomizerCore.Tools.manifest as manifest
+import RandomizerCore.level_shuffle as level_shuffle
+from randomizer_paths import DATA_PATH, CACHE_PATH
+from typing import TYPE_CHECKING
+import random, traceback, os
+from pathlib import Path
+
+if TYPE_CHECKING:
+    import RandomizerCore.Tools.zs_tools as zs_tools
+    import cProfile
+
+VERSION = '0.1.0' # stored in the manifest of every seed, keep in sync with build.py and the window title
+PROFILE_ENV = 'OE_RANDOMIZER_PROFILE' # set to any value to profile every run, like the 'Profile' setting does
+PROFILE_TOP = 40 # number of functions listed in each table of the profile summary
+TRACE_ENV = 'OE_RANDOMIZER_TRACEMALLOC' # set to any value to trace memory in every run, like the 'Trace Memory' setting does
+TRACE_FRAMES = 1 # frames kept per traced allocation, more makes tracing slower but the allocation sites easier to place
+LOW_MEMORY_PENDING = 2 # maps queued per worker in low memory mode, so only a few are ever decoded at once
+MUSH_SETTINGS = ('Levels', 'Weapons', 'Thangs', 'Ink Color', 'Music') # settings that Mush.release.pack depends on
+CANCEL_POLL = 0.05 # seconds between checks for a cancel while waiting on map workers
+INFO_FILE = 'Mush/Octa2DMapInfo.byml' # the encrypted level info in Mush.release.pack
+
+
+class RunCancelled(Exception):
+    """Raised at the next checkpoint after Randomizer.stop is called"""
+
+
+class Randomizer:
+    """Generates a seed from the given settings and writes it to the output folder
+
+    Progress is reported through optional callbacks, which are called on whichever thread runs the randomizer
+    on_error gets the traceback of a failed run, on_report gets the run report as a dict, and on_done is always called last
+    A vanilla cache can be passed in so that many seeds share the same decoded files, like in a batch run"""
+
+    def __init__(self, settings, on_error=None, on_report=None, on_done=None, vanilla_cache=None) -> None:
+        self.on_error = on_error
+        self.on_report = on_report
+        self.on_done = on_done
+        self.thread_active = True
+        self.base_path = Path(settings['Base_RomFS_Path'])
+        # self.dlc_path = Path(settings['DLC_Path'])
+        self.root_out_path = Path(settings['Output_Path']) / str(settings['Seed'])
+        self.seed = settings['Seed']
+        del settings['Base_RomFS_Path']
+        # del settings['DLC_Path']
+        del settings['Output_Path']
+        del settings['Seed']
+        self.settings = settings
+        self.maps_to_add_special = {}
+
+        # tracing memory slows the run down a lot, so it is only done when asked for
+        self.trace_memory = bool(settings.get('Trace Memory', False) or os.environ.get(TRACE_ENV))
+        self.run_report = RunReport(trace_memory=self.trace_memory)
+
+        # maps are decoded by the jobs that patch them, so low memory mode keeps fewer of them in flight at once
+        self.low_memory = settings.get('Low Memory', False)
+
+        # a dry run only writes a spoiler log of what the seed would do, skipping all of the game files
+        # its spoiler and report go in a folder of their own, since the packs in the seed folder may be from other settings
+        self.dry_run = settings.get('Dry Run', False)
+        self.report_path = self.root_out_path
+        if self.dry_run:
+            self.report_path = self.root_out_path.with_name(f"{self.root_out_path.name}.dry-run")
+
+        # files from the last run of this seed are only rebuilt if their inputs changed
+        self.build_cache = BuildCache(self.root_out_path)
+
+        # new files are written in the background to a staging folder, which only replaces the seed folder once the run succeeds
+        self.output = StagedOutput(self.root_out_path, self.run_report)
+
+        # decoded vanilla files are kept between runs, so they only have to be decoded once for each game dump
+        # a dry run only decodes one small file, which is less work than fingerprinting the dump to find its cache
+        use_cache = settings.get('Vanilla Cache', True) and not self.dry_run
+        self.vanilla_cache = vanilla_cache or VanillaCache(self.base_path, CACHE_PATH, enabled=use_cache)
+
+        # now update the output path to match platform formatting
+        # rainbow expansion looks like it uses both base game and oe romfs for console
+        # just base game romfs worked for side order mods, so I will need to test on console to see if oe romfs is needed
+        if settings['Platform'] == "Console":
+            match settings['Region']:
+                case 'EU':
+                    title_id = "0100f8f0000a2000"
+                case 'JP':
+                    title_id = "01003c700009c000"
+                case 'US':
+                    title_id = "01003bc0000a0000"
+            self.out_path = self.root_out_path / "atmosphere" / "contents" / title_id
+            self.out_path = self.out_path / "romfs"
+        else:
+            self.out_path = self.root_out_path / "romfs"
+
+
+    def notify(self, callback, *args) -> None:
+        if callback is not None:
+            callback(*args)
+
+
+    def run(self) -> None:
+        """Makes the mod, then reports how the run went through the callbacks"""
+
+        # the report is made on whichever thread made the randomizer, like the GUI thread, so it is moved to this one
+        self.run_report.bind()
+        tracemalloc = None
+        if self.trace_memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                tracemalloc = None # already traced by someone else, who is left to stop it
+            else:
+                tracemalloc.start(TRACE_FRAMES)
+
+        try:
+            if self.settings.get('Profile') or os.environ.get(PROFILE_ENV):
+                self.profileMod()
+            else:
+                self.makeMod()
+        except RunCancelled:
+            pass # the staging folder is discarded below
+        except Exception:
+            self.output.discard()
+            er = traceback.format_exc()
+            print(er)
+            # send the timings first so they can be included in the error log
+            self.notify(self.on_report, self.run_report.toDict())
+            self.notify(self.on_error, er)
+        else:
+            if self.thread_active:
+                self.run_report.save(self.report_path / 'report.json')
+                self.notify(self.on_report, self.run_report.toDict())
+        finally: # regardless if there was an error or not, we want to tell the progress window that this thread has finished
+            if not self.thread_active:
+                self.output.discard()
+            if tracemalloc is not None:
+                tracemalloc.stop()
+            self.notify(self.on_done)
+
+
+    def stop(self):
+        """Tells the run to stop and skip over all remaining work. Files from this run will also be discarded
+
+        This is safe to call from any thread"""
+
+        self.thread_active = False
+        self.output.cancel()
+
+
+    def checkpoint(self) -> None:
+        """Ends the run early if stop was called. This is checked between every stage, map, and write"""
+
+        if not self.thread_active:
+            raise RunCancelled()
+
+
+    def profileMod(self):
+        """Runs makeMod under cProfile, then saves the profile and a summary of the hotspots to a profile folder in the seed folder
+
+        profile.prof can be opened as a flame graph by tools like snakeviz or tuna
+        Maps are patched on this thread while profiling, so that the time spent inside oead is included"""
+
+        import cProfile
+
+        self.settings['Workers'] = 1
+        profiler = cProfile.Profile()
+        profiler.runcall(self.makeMod, commit=False)
+
+        # only finished runs get a profile. It is staged in a subfolder like the game files, so it is swapped in with the
+        # rest of the seed, and the next run that is not profiled drops it along with any other stale file
+        if self.dry_run:
+            saveProfile(profiler, self.report_path / 'profile')
+            return
+        self.checkpoint()
+        saveProfile(profiler, self.output.stage / 'profile')
+        self.output.commit(self.build_cache.current)
+
+
+    def makeMod(self, commit=True):
+        """Generates the seed and swaps it into place as the seed folder, unless commit is False"""
+
+        import RandomizerCore.Tools.zs_tools as zs_tools
+        import RandomizerCore.Tools.nisasyst as nisasyst
+        import yaml
+
+        # set seed before we start any random generation
+        random.seed(self.seed)
+
+        # read data
+        # the pack is memory mapped, and only the 2 info files that get edited are ever decoded
+        pack_path = self.base_path / 'Pack' / 'Mush.release.pack'
+        with self.run_report.phase('load', 'Pack/Mush.release.pack', pack_path.stat().st_size):
+            sarc_data = zs_tools.RawSARC.fromFile(pack_path)
+
+        with sarc_data:
+            self.checkpoint()
+
+            # read map info data
+            info_file = INFO_FILE
+            with self.run_report.phase('decrypt', info_file, len(sarc_data.files[info_file])) as phase:
+                data = self.vanilla_cache.get(info_file, lambda: decryptInfo(sarc_data))
+                container = nisasyst.NisasystContainer.fromDecrypted(info_file, data)
+                phase['bytes_written'] = len(container.data)
+            map_data = self.parseBYAML(info_file, container.data)
+            self.checkpoint()
+
+            with self.run_report.phase('defineLevels'):
+                self.defineLevels(map_data)
+
+            # edit data
+            if self.settings['Weapons'] or self.settings['Levels'] or self.settings['Thangs']:
+                with self.run_report.phase('editLevels'):
+                    self.editLevels(map_data)
+            self.checkpoint()
+            self.spoiler = self.makeSpoiler(map_data)
+
+            # the pack only needs to be built again if the seed, its settings, or the vanilla pack changed
+            # the data files and the randomizer version are included too, so changes to them or to the code are never missed
+            mush_key = BuildCache.key(self.seed, {k: self.settings[k] for k in MUSH_SETTINGS}, BuildCache.stamp(pack_path),
+                                    BuildCache.stamp(DATA_PATH / 'StageList.yml'), BuildCache.stamp(DATA_PATH / 'Weapons.yml'), VERSION)
+            write_mush = not self.dry_run and not self.build_cache.reuse(self.out_path / 'Pack' / 'Mush.release.pack', mush_key)
+
+            # write map info data
+            if write_mush:
+                container.data = self.repackBYAML(info_file, map_data)
+                self.checkpoint()
+                with self.run_report.phase('encrypt', info_file, len(container.data)) as phase:
+                    sarc_data.files[info_file] = container.repack()
+                    phase['bytes_written'] = len(sarc_data.files[info_file])
+
+            # randomize music and ink color
+            self.checkpoint()
+            info_file = 'Mush/MapInfo.release.byml'
+            map_data = self.parseBYAML(info_file, sarc_data.files[info_file])
+            with self.run_report.phase('randomizeAesthetics'):
+                self.randomizeAesthetics(map_data)
+            self.spoiler['Aesthetics'] = {str(map.get('MapFileName', i)): {'Music': map['BGMType'], 'Ink Color': map['FixTeamColor']}
+                                        for i, map in enumerate(map_data.info)}
+
+            if write_mush:
+                sarc_data.files[info_file] = self.repackBYAML(info_file, map_data)
+                self.checkpoint()
+                self.writeFile('Pack', 'Mush.release.pack', sarc_data)
+
+        spoiler = yaml.dump(self.spoiler, sort_keys=False).encode('utf-8')
+
+        # a dry run only needs the results of the seed, so the maps are never touched and the seed folder is left as is
+        if self.dry_run:
+            self.checkpoint()
+            self.report_path.mkdir(parents=True, exist_ok=True)
+            (self.report_path / 'spoiler.yml').write_bytes(spoiler)
+            return
+
+        self.output.write('spoiler.yml', spoiler)
+
+        with self.run_report.phase('editMapObjs'):
+            self.editMapObjs()
+        self.checkpoint()
+
+        # only the files this run wrote or reused are carried over, so stale ones go away with the old folder
+        self.output.flush()
+        self.build_cache.save(self.output.stage / 'build.json')
+        self.writeManifest(self.build_cache.current)
+        if commit:
+            self.output.commit(self.build_cache.current)
+
+
+    def writeManifest(self, reused) -> None:
+        """Writes the hash of every output file to the staging folder, along with the seed, settings, and versions they came from
+
+        Seeds are shared between players, so the manifests of two runs of the same seed and settings must always match
+        Files this run wrote were hashed while being written. Reused files keep their hash from the last manifest
+
+        Parameters
+        ----------
+        reused : iterable
+            The paths of files in the seed folder that this run kept from the last one
+        """
+
+        self.output.flush()
+        previous = manifest.loadManifest(self.root_out_path / manifest.MANIFEST_FILE).get('files', {})
+        files = dict(self.output.digests)
+        for name in reused:
+            if name not in files:
+                files[name] = previous.get(name) or manifest.fileDigest(self.root_out_path / name)
+        data = manifest.makeManifest(self.seed, self.settings, self.base_path, VERSION, files)
+        manifest.saveManifest(data, self.output.stage / manifest.MANIFEST_FILE)
+
+
+    def makeSpoiler(self, map_data: 'zs_tools.BYAML') -> dict:
+        """Returns the level, weapon, and special setter results of the seed as plain data"""
+
+        spoiler = {'Seed': self.seed, 'Levels': {}, 'Weapons': {}}
+        for old, new in self.stages.items():
+            spoiler['Levels'][self.map_names[old]] = self.map_names[new]
+        for map in map_data.info:
+            if map['UIID'].v > 83:
+                continue
+            spoiler['Weapons'][map['MapName']] = {
+                'Main': [map['MainA'], map['MainB'], map['MainC']],
+                'Sub': [map['SubA'], map['SubB'], map['SubC']]
+            }
+        spoiler['Special Setters'] = dict(self.maps_to_add_special)
+        return spoiler
+
+
+    def parseBYAML(self, name: str, data) -> 'zs_tools.BYAML':
+        """Parses an uncompressed BYAML file as a timed phase"""
+
+        import RandomizerCore.Tools.zs_tools as zs_tools
+
+        with self.run_report.phase('parse', name, len(data)):
+            return zs_tools.BYAML(data=data, compressed=False)
+
+
+    def repackBYAML(self, name: str, map_data: 'zs_tools.BYAML') -> bytes:
+        """Repacks an uncompressed BYAML file as a timed phase"""
+
+        with self.run_report.phase('repack', name) as phase:
+            data = bytes(map_data.repack())
+            phase['bytes_written'] = len(data)
+        return data
+
+
+    def defineLevels(self, map_data: 'zs_tools.BYAML') -> None:
+        """Makes a list of map names and randomizes levels"""
+
+        import yaml
+
+        # grab valid level names from the map info data
+        self.map_names = {map['UIID'].v: map['MapName'] for map in map_data.info
+                    if map['UIID'].v < 84}
+        if len(self.map_names) != 84:
+            raise IndexError(f"Not enough maps found. Total found: {len(self.map_names)}")
+
+        # levels stay in their vanilla spots unless they get shuffled below
+        self.stages = {id: id for id in self.map_names}
+        if not self.settings['Levels'] and not self.settings['Thangs']:
+            return
+
+        with open(DATA_PATH / 'StageList.yml', 'r') as f:
+            stages: dict = yaml.safe_load(f)
+
+        self.stages = level_shuffle.shuffleLevels(list(stages.values()), self.settings['Thangs'])
+
+
+    def editLevels(self, map_data: 'zs_tools.BYAML') -> None:
+        """Randomizes weapons and level locations depending on user settings"""
+
+        import oead, yaml
+
+        if not self.thread_active:
+            return
+
+        # get weapon data if needed
+        if self.settings['Weapons']:
+            with open(DATA_PATH / 'Weapons.yml', 'r') as f:
+                weapons = yaml.safe_load(f)
+            first_weapons = {}
+            for map in map_data.info:
+                if map['MapName'] in list(self.map_names.values()):
+                    first_weapons[map['MapName']] = {'Main': map['MainA'], 'Sub': map['SubA']}
+
+        self.maps_to_add_special = {}
+
+        for map in map_data.info:
+            if map['UIID'].v > 83:
+                continue
+
+            new_map = self.map_names[self.stages[map['UIID'].v]]
+            map['MapName'] = new_map
+
+            # save myself credits when testing lol
+            map['Admission'] = oead.S32(0)
+
+            if not self.settings['Weapons']:
+                continue
+
+            # check if new level is an infinite special level
+            vspecial = first_weapons[new_map]['Main'] in ('Jetpack', 'AquaBall')
+            if vspecial:
+                map['MainA'] = first_weapons[new_map]['Main']
+                map['SubA'] = '-'
+                map['MainB'] = '-'
+                map['SubB'] = '-'
+                map['MainC'] = '-'
+                map['SubC'] = '-'
+                continue
+
+            # 5% chance for a special per stage
+            if random.randint(0, 19) == random.choice(list(range(20))):
+                map['MainA'] = random.choice(('Jetpack', 'AquaBall'))
+                map['SubA'] = '-'
+                map['MainB'] = '-'
+                map['SubB'] = '-'
+                map['MainC'] = '-'
+                map['SubB'] = '-'
+                self.maps_to_add_special[new_map] = map['MainA']
+                continue
+
+            # if not a special level, make the first weapon vanilla and randomize the next 2
+            no_dups = list(weapons['Main_Weapons']).copy()
+            mainB = no_dups.pop(no_dups.index(random.choice(no_dups)))
+            mainC = no_dups.pop(no_dups.index(random.choice(no_dups)))
+            map['MainA'] = first_weapons[new_map]['Main']
+            map['MainB'] = mainB
+            map['MainC'] = mainC
+            map['SubA'] = first_weapons[new_map]['Sub']
+            map['SubB'] = random.choice(weapons['Sub_Weapons'])
+            map['SubC'] = random.choice(weapons['Sub_Weapons'])
+            if map['RewardB'] == oead.S32(0):
+                map['RewardB'] = oead.S32(int(map['RewardA']) + 100)
+            if map['RewardC'] == oead.S32(0):
+                map['RewardC'] = oead.S32(int(map['RewardB']) + 200)
+
+
+    def randomizeAesthetics(self, map_data) -> None:
+        """Randomizes music and ink color depending on user settings"""
+
+        # dicts keep the order the values were first seen in, unlike sets whose order changes with the hash seed of the process
+        musics = {}
+        colors = {}
+        for map in map_data.info:
+            if 'BGMType' in map:
+                musics[map['BGMType']] = None
+            if 'FixTeamColor' in map:
+                colors[map['FixTeamColor']] = None
+        
+        musics = list(musics)
+        random.shuffle(musics)
+        colors = list(colors)
+        random.shuffle(colors)
+        for map in map_data.info:
+            map['BGMType'] = random.choice(musics)
+            map['FixTeamColor'] = random.choice(colors)
+
+
+    def editMapObjs(self) -> None:
+        """Edits maps to add/remove stuff as necessary
+
+        Every map is patched on its own, so the jobs are handed to a pool of worker processes when allowed"""
+
+        import RandomizerCore.Tools.zs_tools as zs_tools
+        import RandomizerCore.map_patches as map_patches
+
+        # emulator users can trade file size for speed with the optional 'Compression' setting
+        profile = self.settings.get('Compression', 'default')
+        if profile not in zs_tools.COMPRESSION_PROFILES:
+            raise ValueError(f"Unknown compression profile: {profile}")
+
+        # the pack is memory mapped, so maps that are passed through untouched are never read into memory here
+        pack_path = self.base_path / 'Pack' / 'Map.pack'
+        with self.run_report.phase('load', 'Pack/Map.pack', pack_path.stat().st_size):
+            sarc_data = zs_tools.RawSARC.fromFile(pack_path)
+
+        with sarc_data:
+            # only maps that some patch set applies to are patched
+            selected = []
+            for k,map in self.map_names.items():
+                self.checkpoint()
+                patches = map_patches.selectPatches(map, self.settings, self.maps_to_add_special.get(map))
+                if not patches:
+                    continue
+                if f"Map/{map}.szs" not in sarc_data.files:
+                    print('Map object not found:', map)
+                    continue
+                selected.append((map, patches))
+
+            # no map needs changes, so the vanilla Map.pack is left to the game
+            if not selected:
+                return
+
+            # the patched maps only depend on the maps, the patch sets, and the profile, so the last Map.pack is kept if they are the same
+            map_key = BuildCache.key([[map, patches, profile] for map, patches in selected], BuildCache.stamp(pack_path),
+                                    BuildCache.stamp(map_patches.PATCHES_PATH), VERSION)
+            if self.build_cache.reuse(self.out_path / 'Pack' / 'Map.pack', map_key):
+                return
+
+            # jobs get the compressed map, which is a view into the memory mapped pack, along with its vanilla cache entry
+            # the workers then read the decoded map from the cache or decompress and store it themselves, side by side
+            # only maps already decoded in memory, like in a batch run, are handed over decoded
+            jobs = []
+            for map, patches in selected:
+                map_sarc_name = f"Map/{map}.szs"
+                if self.vanilla_cache.memory is not None and map_sarc_name in self.vanilla_cache.memory:
+                    jobs.append((map, self.vanilla_cache.memory[map_sarc_name], patches, profile, None))
+                else:
+                    jobs.append((map, sarc_data.files[map_sarc_name], patches, profile, self.vanilla_cache.entry(map_sarc_name)))
+
+            results = self.runMapJobs(jobs)
+            self.vanilla_cache.trim()
+            for job, (data, phases) in zip(jobs, results):
+                self.run_report.extend(phases)
+                if data is None:
+                    print('Map object not found:', job[0])
+                    continue
+                sarc_data.files[f"Map/{job[0]}.szs"] = data
+
+            self.writeFile('Pack', 'Map.pack', sarc_data)
+
+
+    def runMapJobs(self, jobs: list) -> list:
+        """Runs patchMap over each job and returns the results in the same order
+
+        The number of worker processes is taken from the optional 'Workers' setting, defaulting to the CPU count
+        Maps are patched serially on this thread if only 1 worker is allowed or if a pool cannot be started
+        In low memory mode, only a couple of maps per worker are handed to the pool at a time instead of all of them
+        A cancel is checked between maps. Queued maps are then dropped right away, and the workers finish the maps they are on
+        in the background, since killing them by hand can leave the pool's own threads blocked forever"""
+
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        from concurrent.futures.process import BrokenProcessPool
+
+        workers = min(self.settings.get('Workers', os.cpu_count() or 1), len(jobs))
+        if workers > 1:
+            try:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            except (OSError, NotImplementedError):
+                print('Could not start map workers, falling back to serial patching')
+            else:
+                cancelled = False
+                try:
+                    pending = workers * LOW_MEMORY_PENDING if self.low_memory else len(jobs)
+                    futures = []
+                    for job in jobs:
+                        while len(running := [future for future in futures if not future.done()]) >= pending:
+                            wait(running, timeout=CANCEL_POLL, return_when=FIRST_COMPLETED)
+                            self.checkpoint()
+                        # views into the memory mapped pack cannot be pickled, so workers get a copy of their map
+                        futures.append(pool.submit(patchMap, job[0], bytes(job[1]), *job[2:]))
+                    while wait(futures, timeout=CANCEL_POLL).not_done:
+                        self.checkpoint()
+                    results = [future.result() for future in futures]
+                except RunCancelled:
+                    cancelled = True
+                    raise
+                except (OSError, BrokenProcessPool):
+                    print('Could not start map workers, falling back to serial patching')
+                else:
+                    return results
+                finally:
+                    # also runs when a map fails, so no workers outlive the run. A cancel does not wait on the maps in flight
+                    pool.shutdown(wait=not cancelled, cancel_futures=True)
+
+        results = []
+        for job in jobs:
+            self.checkpoint()
+            results.append(patchMap(*job))
+        return results
+
+
+    def writeFile(self, path: str, name: str, data: 'bytes | zs_tools.RawSARC'):
+        """ Queues the file to be written to the staging folder in the background, so the run can move on right away
+        
+        Parameters
+        ----------
+        path : str
+            The path of the file, relative to the RomFS
+        name : str
+            The name of the file to write to
+        data : bytes | RawSARC
+            The raw data to write to the file, or an archive to stream into it without building it in memory
+        """
+
+        self.checkpoint()
+        full_out_path = self.out_path / path / name
+        self.output.write(full_out_path.relative_to(self.root_out_path).as_posix(), data)
+
+
+def saveProfile(profiler: 'cProfile.Profile', folder: Path) -> None:
+    """Saves the raw profile and a summary of the slowest functions to the folder"""
+
+    import pstats
+
+    folder.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(folder / 'profile.prof')
+    with open(folder / 'profile.txt', 'w') as f:
+        stats = pstats.Stats(profiler, stream=f)
+        stats.sort_stats('tottime').print_stats(PROFILE_TOP)
+        stats.sort_stats('cumulative').print_stats(PROFILE_TOP)
+
+
+def decryptInfo(sarc_data: 'zs_tools.RawSARC') -> bytes:
+    """Returns the decrypted level info from Mush.release.pack"""
+
+    import RandomizerCore.Tools.nisasyst as nisasyst
+
+    return nisasyst.NisasystContainer(INFO_FILE, sarc_data.files[INFO_FILE]).data
+
+
+def decompressMap(sarc_data: 'zs_tools.RawSARC', name: str) -> bytes:
+    """Returns a decompressed map archive from Map.pack"""
+
+    import RandomizerCore.Tools.zs_tools as zs_tools
+
+    return zs_tools.zs_decompress(sarc_data.files[name])
+
+
+def preloadVanilla(cache: VanillaCache, romfs: Path, maps: bool = True) -> None:
+    """Decodes every vanilla file a run could need into the cache up front, so runs that share it never decode anything
+
+    The maps are left out if maps is False, like for dry runs, which only read the level info"""
+
+    import RandomizerCore.Tools.zs_tools as zs_tools
+
+    with zs_tools.RawSARC.fromFile(romfs / 'Pack' / 'Mush.release.pack') as sarc_data:
+        cache.get(INFO_FILE, lambda: decryptInfo(sarc_data))
+    if not maps:
+        return
+    with zs_tools.RawSARC.fromFile(romfs / 'Pack' / 'Map.pack') as sarc_data:
+        for name in sarc_data.names:
+            if name.startswith('Map/') and name.endswith('.szs'):
+                cache.get(name, lambda: decompressMap(sarc_data, name))
+
+
+def patchMap(map: str, data: bytes, patches: tuple, profile: str, cache_file: Path | None = None) -> tuple:
+    """Applies the named patch sets from MapPatches.yml to a map archive and returns it compressed along with the timed phases
+
+    The archive can be given either compressed or already decompressed, like when it comes from an in memory vanilla cache
+    If a vanilla cache entry is given, the decoded map is read from it, or stored in it after decompressing
+    This runs in worker processes, so it only takes and returns plain data. The data is None if the map has no object list
+    Each copy of the map is let go as soon as the next one is made, so only about 2 are held at any time"""
+
+    import RandomizerCore.Tools.zs_tools as zs_tools
+    import RandomizerCore.map_patches as map_patches
+    from RandomizerCore.Tools.vanilla_cache import readEntry, writeEntry
+
+    report = RunReport()
+    with report.phase('map', map, len(data)) as map_phase:
+        decoded = readEntry(cache_file)
+        if decoded is not None:
+            data = decoded
+        elif data[:4] == b'Yaz0':
+            with report.phase('decompress', map, len(data)) as phase:
+                data = zs_tools.zs_decompress(data)
+                phase['bytes_written'] = len(data)
+            if cache_file is not None:
+                writeEntry(cache_file, data)
+        map_sarc = zs_tools.SARC(data=data, compressed=False, keep_reader=False)
+        data = None
+        info_file = f"{map}.byaml"
+        if info_file not in map_sarc.writer.files:
+            return None, report.phases
+
+        # every patch set the map needs is applied together, so each map is only decoded and encoded once
+        data = map_sarc.writer.files[info_file]
+        with report.phase('patch', info_file, len(data)) as phase:
+            map_sarc.writer.files[info_file], phase['method'] = map_patches.applyPatches(data, patches)
+            phase['bytes_written'] = len(map_sarc.writer.files[info_file])
+        with report.phase('compress', map) as phase:
+            data = map_sarc.repack()
+            map_sarc = None
+            data = bytes(zs_tools.zs_compress(data, profile))
+            phase['bytes_written'] = map_phase['bytes_written'] = len(data)
+    return data, report.phases
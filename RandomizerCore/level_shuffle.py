@@ -0,0 +1,51 @@
+"""Level shuffling for the metro lines, kept free of any file, Qt or oead access
+
+This lets seeds be generated and checked in bulk without touching any game files"""
+
+import random
+
+THANG_IDS = (80, 81, 82, 83)
+
+
+def shuffleLevels(layout: list, shuffle_thangs: bool, rng=random, thang_ids=THANG_IDS) -> dict:
+    """Shuffles levels between the slots of the metro lines and returns a {vanilla ID: new ID} mapping
+
+    Every slot is filled exactly once, so this runs in linear time with no retries
+
+    Parameters
+    ----------
+    layout : list
+        The vanilla level IDs of each line, in order. This is the data in StageList.yml
+    shuffle_thangs : bool
+        If True, each thang is moved to the start or end of its own random line. Otherwise the thangs keep their vanilla slots
+    rng : random.Random | module
+        The source of randomness, which defaults to the seeded global random module
+    thang_ids : tuple
+        The IDs of the levels that are treated as thangs
+    """
+
+    thangs = sorted(id for line in layout for id in line if id in thang_ids)
+    levels = [id for line in layout for id in line if id not in thang_ids]
+    rng.shuffle(levels)
+
+    lines = [[None] * len(line) for line in layout]
+    if shuffle_thangs:
+        if len(thangs) > len(layout):
+            raise ValueError(f"Not enough lines for every thang. Lines: {len(layout)}, Thangs: {len(thangs)}")
+        for thang, line_num in zip(thangs, rng.sample(range(len(layout)), len(thangs))):
+            slot = -1 if rng.random() >= 0.5 else 0
+            lines[line_num][slot] = thang
+    else:
+        for vanilla_line, line in zip(layout, lines):
+            for slot, id in enumerate(vanilla_line):
+                if id in thang_ids:
+                    line[slot] = id
+
+    # fill the remaining slots in order from the shuffled levels
+    new_levels = iter(levels)
+    for line in lines:
+        for slot, id in enumerate(line):
+            if id is None:
+                line[slot] = next(new_levels)
+
+    return {old: new for vanilla_line, line in zip(layout, lines) for old, new in zip(vanilla_line, line)}
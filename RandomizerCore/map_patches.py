@@ -0,0 +1,98 @@
+"""Map object patches, described in Data/MapPatches.yml instead of in code
+
+Patch sets are loaded and converted to BYAML values once per process, then every set a map needs is applied in one go"""
+
+import RandomizerCore.Tools.zs_tools as zs_tools
+from randomizer_paths import DATA_PATH
+import functools, oead, yaml
+
+PATCHES_PATH = DATA_PATH / 'MapPatches.yml'
+SELECTORS = ('Setting', 'Special', 'Maps')
+OPERATIONS = ('Remove', 'Modify', 'Add')
+
+
+def toBYML(value):
+    """Converts a value loaded from YAML into the types oead writes, with whole numbers as S32 and decimals as F32"""
+
+    if isinstance(value, bool) or isinstance(value, str) or value is None:
+        return value
+    if isinstance(value, int):
+        return oead.S32(value)
+    if isinstance(value, float):
+        return oead.F32(value)
+    if isinstance(value, dict):
+        return {k: toBYML(v) for k,v in value.items()}
+    if isinstance(value, list):
+        return [toBYML(v) for v in value]
+    raise ValueError(f"Unsupported value in map patches: {value!r}")
+
+
+@functools.lru_cache
+def loadPatches() -> dict:
+    """Returns every patch set in MapPatches.yml with its objects already converted, keyed by name"""
+
+    with open(PATCHES_PATH, 'r') as f:
+        patches: dict = yaml.safe_load(f)
+
+    compiled = {}
+    for name, patch in patches.items():
+        unknown = set(patch) - set(SELECTORS) - set(OPERATIONS)
+        if unknown:
+            raise KeyError(f"Unknown fields in map patch {name}: {', '.join(sorted(unknown))}")
+        compiled[name] = {k: v for k,v in patch.items() if k in SELECTORS}
+        compiled[name]['Remove'] = [toBYML(match) for match in patch.get('Remove', [])]
+        compiled[name]['Modify'] = [(toBYML(change['Match']), toBYML(change['Set'])) for change in patch.get('Modify', [])]
+        compiled[name]['Add'] = [toBYML(obj) for obj in patch.get('Add', [])]
+    return compiled
+
+
+def selectPatches(map: str, settings: dict, special: str | None) -> tuple:
+    """Returns the names of the patch sets that apply to a map, in the order they are listed"""
+
+    names = []
+    for name, patch in loadPatches().items():
+        if 'Setting' in patch and not settings.get(patch['Setting']):
+            continue
+        if 'Special' in patch and patch['Special'] != special:
+            continue
+        if 'Maps' in patch and map not in patch['Maps']:
+            continue
+        names.append(name)
+    return tuple(names)
+
+
+def matches(obj, fields: dict) -> bool:
+    return all(k in obj and obj[k] == v for k,v in fields.items())
+
+
+def applyPatches(data, names: tuple) -> tuple:
+    """Applies the named patch sets to an uncompressed map BYAML and returns the new data along with how it was patched
+
+    If the sets only add objects, they are appended straight into the binary file. Otherwise, or if the map is missing
+    a key that a new object uses, the whole file is parsed and repacked instead"""
+
+    patches = [loadPatches()[name] for name in names]
+    if not any(patch['Remove'] or patch['Modify'] for patch in patches):
+        try:
+            map_data = zs_tools.BYAMLPatch(data)
+            for patch in patches:
+                for obj in patch['Add']:
+                    map_data.append('Objs', obj)
+            return map_data.repack(), 'patch'
+        except (KeyError, ValueError):
+            pass
+
+    map_data = zs_tools.BYAML(data=data, compressed=False)
+    for patch in patches:
+        # the kept objects are copied into a new array, since clearing the old one would free them
+        for match in patch['Remove']:
+            map_data.info['Objs'] = oead.byml.Array([obj for obj in map_data.info['Objs'] if not matches(obj, match)])
+        objs = map_data.info['Objs']
+        for match, fields in patch['Modify']:
+            for obj in objs:
+                if matches(obj, match):
+                    for k,v in fields.items():
+                        obj[k] = v
+        for obj in patch['Add']:
+            objs.append(obj)
+    return map_data.repack(), 'repack'
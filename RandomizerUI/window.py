@@ -1,18 +1,37 @@
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtWidgets import (QMainWindow, QLabel, QLineEdit, QPushButton, QGroupBox, QProgressBar,
     QCheckBox, QComboBox, QSpacerItem, QHBoxLayout, QVBoxLayout, QWidget, QFileDialog, QSizePolicy)
 from RandomizerCore.metro import Metro_Process
+from RandomizerCore.Tools.fingerprint import knownDumps, regionWarning
 from randomizer_paths import SETTINGS_PATH, LOGS_PATH
 from pathlib import Path
-import random, string, yaml
+import json, random, string, threading, yaml
+
+ROMFS_CHECK_DELAY = 500 # milliseconds after the last edit of the RomFS path before it is checked, so typing never starts a check
 
 
 class RandomizerWindow(QMainWindow):
+    romfs_checked = Signal(str, str, str) # the path and region that were checked, and the warning to show
+
     def __init__(self) -> None:
         super(RandomizerWindow, self).__init__()
         self.ui = Ui_RandomizerWindow()
         self.ui.setupUi(self)
+        self.extra_settings = {} # settings without a widget, like 'Workers', which are kept as they were in settings.txt
         self.loadSettings()
+        self.romfs_check = None
+
+        # the check can only warn about dumps listed in KnownDumps.yml, so it is not wired up at all while that is empty
+        self.check_region = bool(knownDumps())
+        if self.check_region:
+            self.romfs_timer = QTimer(self)
+            self.romfs_timer.setSingleShot(True)
+            self.romfs_timer.setInterval(ROMFS_CHECK_DELAY)
+            self.romfs_timer.timeout.connect(self.checkRomFS)
+            self.romfs_checked.connect(self.showRomFSWarning)
+            self.ui.base_line.textChanged.connect(lambda: self.romfs_timer.start())
+            self.ui.region_box.currentTextChanged.connect(self.checkRomFS)
+            self.checkRomFS()
         self.show()
 
 
@@ -59,13 +78,47 @@ class RandomizerWindow(QMainWindow):
         rando_window.show()
 
 
-    def validatePaths(self) -> bool:
-        """Validates the romfs path as well as checking if the output path exists"""
-
+    def getRomFSPath(self) -> Path:
         romfs_path = Path(self.ui.base_line.text())
         if Path(romfs_path / "romfs").exists():
             romfs_path = romfs_path / "romfs"
+        return romfs_path
+
+
+    def checkRomFS(self) -> None:
+        """Warns if the RomFS is from a different region than the one selected
+        
+        This runs every time the region changes, and once the path has stopped changing. The packs may need to be hashed,
+        so that is done on a background thread and the warning is shown once it is done"""
+
+        if not self.check_region:
+            return
+        self.romfs_timer.stop()
+        romfs_path = self.getRomFSPath()
+        region = self.ui.region_box.currentText()[-2:]
+        self.romfs_check = (str(romfs_path), region)
+        if not (self.ui.base_line.text() and Path(romfs_path / "Pack" / "Mush.release.pack").is_file()):
+            self.showRomFSWarning(str(romfs_path), region, '')
+            return
+
+        check = lambda: self.romfs_checked.emit(str(romfs_path), region, regionWarning(romfs_path, region))
+        threading.Thread(target=check, daemon=True).start()
+
+
+    def showRomFSWarning(self, romfs_path: str, region: str, warning: str) -> None:
+        # checks that finish after the path or region changed again are out of date
+        if (romfs_path, region) != self.romfs_check:
+            return
+        self.ui.region_box.setToolTip(warning)
+        self.ui.region_box.setStyleSheet("background-color: orange;" if warning else '')
+
+
+    def validatePaths(self) -> bool:
+        """Validates the romfs path as well as checking if the output path exists"""
+
+        romfs_path = self.getRomFSPath()
         romfs_valid = Path(romfs_path / "Pack" / "Mush.release.pack").is_file()
+        self.checkRomFS()
 
         # dlc_path = Path(self.ui.dlc_line.text())
         # if Path(dlc_path / "romfs").exists():
@@ -113,6 +166,7 @@ class RandomizerWindow(QMainWindow):
             settings[check.text()] = check.isChecked()
         settings["Region"] = self.ui.region_box.currentText()[-2:]
         settings["Platform"] = self.ui.platform_box.currentText().split(":  ")[1]
+        settings.update(self.extra_settings)
         return settings
 
 
@@ -127,13 +181,16 @@ class RandomizerWindow(QMainWindow):
             return
         with open(SETTINGS_PATH, 'r') as f:
             settings = yaml.safe_load(f)
+        self.extra_settings = {}
+        widgets = self.getSettings()
+        self.extra_settings = {k: v for k, v in settings.items() if k not in widgets}
         self.ui.base_line.setText(settings['Base_RomFS_Path'])
         # self.ui.dlc_line.setText(settings['DLC_Path'])
         self.ui.out_line.setText(settings['Output_Path'])
         self.ui.seed_line.setText(settings['Seed'])
         for check in self.findChildren(QCheckBox):
             check: QCheckBox
-            check.setChecked(settings[check.text()])
+            check.setChecked(settings.get(check.text(), False)) # settings added since the file was saved start off
         self.ui.region_box.setCurrentIndex(self.ui.region_box.findText(f"Region:  {settings['Region']}"))
         self.ui.platform_box.setCurrentIndex(self.ui.platform_box.findText(f"Platform:  {settings['Platform']}"))
 
@@ -208,6 +265,8 @@ class Ui_RandomizerWindow(object):
         color_check = QCheckBox("Ink Color", group)
         music_check = QCheckBox("Music", group)
         lava_check = QCheckBox("Enemy Ink Is Lava", group)
+        memory_check = QCheckBox("Low Memory", group)
+        memory_check.setToolTip("Edits fewer maps at once, for devices with little RAM. Makes the randomizer slower")
         hl = QHBoxLayout()
         hl.addWidget(weapon_check)
         hl.addSpacerItem(self.createHorizontalSpacer())
@@ -223,6 +282,10 @@ class Ui_RandomizerWindow(object):
         hl.addSpacerItem(self.createHorizontalSpacer())
         hl.addWidget(lava_check)
         ovl.addLayout(hl)
+        hl = QHBoxLayout()
+        hl.addWidget(memory_check)
+        hl.addSpacerItem(self.createHorizontalSpacer())
+        ovl.addLayout(hl)
         group.setLayout(ovl)
         vl.addWidget(group)
 
@@ -271,6 +334,7 @@ class WorkWindow(QMainWindow):
         self.done = False
         self.error = False
         self.cancel = False
+        self.report = None
         self.startWorkThread()
 
 
@@ -278,15 +342,22 @@ class WorkWindow(QMainWindow):
         self.work_thread = Metro_Process(self, self.settings)
         self.work_thread.is_done.connect(self.workDone)
         self.work_thread.error.connect(self.workError)
+        self.work_thread.report.connect(self.workReport)
         self.work_thread.start()
 
 
+    def workReport(self, report: dict) -> None:
+        self.report = report
+
+
     def workError(self, er_message: str) -> None:
         self.error = True
         with open(LOGS_PATH, 'w') as f:
             f.write(f"{self.windowTitle()}")
             f.write(f'\n\n{er_message}')
             f.write(f'\n\n{self.settings}')
+            if self.report:
+                f.write(f'\n\n{json.dumps(self.report["totals"], indent=4)}')
 
 
     def workDone(self):
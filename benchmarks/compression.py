@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Compares the Yaz0 compression profiles on the map archives of a real RomFS
+
+Usage: python -m benchmarks.compression <RomFS path> [--repeat N]
+
+Every map archive in Pack/Map.pack is decompressed once, then compressed with each profile
+The throughput is measured against the decompressed size, so the profiles can be compared directly"""
+
+from RandomizerCore.Tools import zs_tools
+from pathlib import Path
+import argparse, time
+import oead
+
+
+def loadMaps(romfs: Path) -> list:
+    """Returns the decompressed data of every map archive in Map.pack"""
+
+    with open(romfs / 'Pack' / 'Map.pack', 'rb') as f:
+        sarc = oead.Sarc(f.read())
+    return [bytes(zs_tools.zs_decompress(file.data)) for file in sarc.get_files()
+            if file.name.startswith('Map/') and file.name.endswith('.szs')]
+
+
+def benchProfile(maps: list, profile: str, repeat: int) -> dict:
+    """Compresses every map with the given profile and returns the best time out of all repeats"""
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = sum(len(zs_tools.zs_compress(data, profile)) for data in maps)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'size': size}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the Yaz0 compression profiles')
+    parser.add_argument('romfs', type=Path, help='Path to the base game RomFS')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs per profile, the fastest is kept')
+    args = parser.parse_args()
+
+    romfs = args.romfs / 'romfs' if (args.romfs / 'romfs').exists() else args.romfs
+    maps = loadMaps(romfs)
+    raw_size = sum(len(data) for data in maps)
+    print(f"{len(maps)} map archives, {raw_size / 1024**2:.2f} MiB decompressed\n")
+
+    print(f"{'Profile':<10}{'Time (s)':>10}{'MiB/s':>10}{'Size (MiB)':>12}{'Ratio':>8}")
+    for profile in zs_tools.COMPRESSION_PROFILES:
+        result = benchProfile(maps, profile, args.repeat)
+        print(f"{profile:<10}{result['seconds']:>10.3f}{raw_size / 1024**2 / result['seconds']:>10.1f}"
+              f"{result['size'] / 1024**2:>12.2f}{result['size'] / raw_size:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
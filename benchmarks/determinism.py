@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Checks that seeds come out byte for byte the same no matter which process or machine makes them
+
+Usage: python -m benchmarks.determinism [SEED ...] [--count N] [--runs N] [--objects N] [--settings FILE] [--romfs PATH]
+
+The same batch of seeds is generated by several randomizer_cli.py processes side by side, each with its own PYTHONHASHSEED,
+so anything that depends on set or hash order shows up as a difference. The manifests of every run are then compared
+against the first one. A synthetic RomFS is used unless --romfs is given, and exits with 1 if any seed differs or fails"""
+
+from benchmarks.fixtures import buildRomFS
+from benchmarks.pipeline import SETTINGS
+from RandomizerCore.Tools.manifest import MANIFEST_FILE, loadManifest, compareManifests
+from randomizer_paths import ROOT_PATH
+from pathlib import Path
+import argparse, os, subprocess, sys, tempfile
+import yaml
+
+
+def startRun(settings: Path, seeds: list, out: Path, hash_seed: int, workers: int) -> subprocess.Popen:
+    """Starts generating the seeds in a new randomizer_cli.py process with the given hash seed"""
+
+    env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    command = [sys.executable, str(ROOT_PATH / 'randomizer_cli.py'), str(settings), *seeds, '--out', str(out), '--workers', str(workers)]
+    return subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+def checkSeeds(seeds: list, outs: list) -> list:
+    """Returns a line for every seed whose manifest is missing from a run or does not match the first run"""
+
+    problems = []
+    for seed in seeds:
+        manifests = [loadManifest(out / seed / MANIFEST_FILE) for out in outs]
+        if not manifests[0]:
+            problems.append(f"{seed}: no manifest from run 0")
+            continue
+        for run, current in enumerate(manifests[1:], 1):
+            if not current:
+                problems.append(f"{seed}: no manifest from run {run}")
+            for difference in compareManifests(manifests[0], current):
+                problems.append(f"{seed}: run {run} has {difference}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Check that seeds are the same across processes and hash seeds')
+    parser.add_argument('seeds', nargs='*', help='Seeds to generate')
+    parser.add_argument('--count', type=int, default=0, help='Number of numbered seeds to generate, on top of any given seeds')
+    parser.add_argument('--runs', type=int, default=3, help='Number of processes that each generate every seed')
+    parser.add_argument('--objects', type=int, default=100, help='Number of objects in each synthetic map')
+    parser.add_argument('--settings', type=Path, help='Settings file, in the format the GUI saves. Defaults to every option on')
+    parser.add_argument('--romfs', type=Path, help='Base RomFS path to use instead of a synthetic one')
+    args = parser.parse_args()
+
+    settings = dict(SETTINGS)
+    if args.settings:
+        with open(args.settings, 'r') as f:
+            settings = yaml.safe_load(f)
+    seeds = args.seeds + [f"determinism{i}" for i in range(args.count)]
+    if not seeds:
+        seeds = [f"determinism{i}" for i in range(4)]
+    workers = max(1, (os.cpu_count() or 1) // args.runs)
+
+    with tempfile.TemporaryDirectory() as temp:
+        temp = Path(temp)
+        settings['Base_RomFS_Path'] = str(args.romfs or buildRomFS(temp / 'romfs', args.objects))
+        # every run decodes the vanilla files itself, so a bad cache entry cannot hide a difference or cause one
+        settings['Vanilla Cache'] = False
+        with open(temp / 'settings.txt', 'w') as f:
+            yaml.safe_dump(settings, f)
+
+        outs = [temp / f"run{run}" for run in range(args.runs)]
+        runs = [startRun(temp / 'settings.txt', seeds, out, run, workers) for run, out in enumerate(outs)]
+        for run, process in enumerate(runs):
+            output, _ = process.communicate()
+            if process.returncode:
+                print(f"Run {run} failed:\n{output}")
+
+        problems = checkSeeds(seeds, outs)
+
+    print(f"Seeds: {len(seeds)}, runs: {args.runs}, differences: {len(problems)}")
+    for problem in problems:
+        print(problem)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Builds a synthetic but structurally valid RomFS, so the randomizer can be timed without a real game dump
+
+Only the files that the randomizer reads are made:
+    Pack/Mush.release.pack, with a nisasyst wrapped Mush/Octa2DMapInfo.byml and Mush/MapInfo.release.byml
+    Pack/Map.pack, with a Yaz0 compressed map archive for each of the 84 levels"""
+
+import RandomizerCore.Tools.nisasyst as nisasyst
+from randomizer_paths import DATA_PATH
+from pathlib import Path
+import random, oead, yaml
+
+
+MAP_COUNT = 84
+EXTRA_INFO_COUNT = 6 # entries past the 84 levels, which the randomizer has to skip over
+UNIT_NAMES = ('Obj_InkRail', 'Enm_Takopter', 'Lft_Block', 'Obj_Sponge', 'Enm_Octarian', 'Obj_Goal')
+
+
+def mapName(id: int) -> str:
+    return f"Fld_Octa_{id:03d}"
+
+
+def makeObj(index: int, rng: random.Random) -> dict:
+    """Returns a map object laid out like the ones in the vanilla maps"""
+
+    obj = {}
+    obj['Id'] = f"obj{index}"
+    obj['IsLinkDest'] = False
+    obj['LayerConfigName'] = 'Cmn'
+    obj['Links'] = {}
+    obj['ModelName'] = None
+    obj['Rotate'] = {'X': oead.F32(0.0), 'Y': oead.F32(rng.uniform(-180, 180)), 'Z': oead.F32(0.0)}
+    obj['Scale'] = {'X': oead.F32(1.0), 'Y': oead.F32(1.0), 'Z': oead.F32(1.0)}
+    obj['Team'] = oead.S32(rng.randint(0, 2))
+    obj['Translate'] = {'X': oead.F32(rng.uniform(-500, 500)), 'Y': oead.F32(rng.uniform(0, 100)),
+                        'Z': oead.F32(rng.uniform(-500, 500))}
+    obj['Type'] = oead.S32(rng.randint(0, 3))
+    obj['UnitConfigName'] = rng.choice(UNIT_NAMES)
+    return obj
+
+
+def makeMapArchive(name: str, objects: int, rng: random.Random) -> bytes:
+    """Returns a compressed map archive holding the object list and some filler data"""
+
+    doc = oead.byml.Hash({
+        'FilePath': name,
+        'Objs': oead.byml.Array([makeObj(i, rng) for i in range(objects)]),
+        'Rails': oead.byml.Array([]),
+    })
+    writer = oead.SarcWriter(oead.Endianness.Little)
+    writer.files[f"{name}.byaml"] = oead.byml.to_binary(doc, False, 3)
+    writer.files[f"{name}_Preview.bin"] = rng.randbytes(0x4000)
+    return bytes(oead.yaz0.compress(writer.write()[1]))
+
+
+def makeMushPack(rng: random.Random) -> bytes:
+    """Returns a Mush.release.pack with both info files plus unrelated filler files"""
+
+    with open(DATA_PATH / 'Weapons.yml', 'r') as f:
+        weapons = yaml.safe_load(f)
+
+    info = []
+    for id in range(MAP_COUNT + EXTRA_INFO_COUNT):
+        map = {}
+        map['UIID'] = oead.S32(id)
+        map['MapName'] = mapName(id) if id < MAP_COUNT else f"Fld_OctaExtra_{id:03d}"
+        # a couple of levels are infinite special levels in the vanilla game
+        map['MainA'] = ('Jetpack', 'AquaBall')[id % 2] if id in (12, 47) else rng.choice(weapons['Main_Weapons'])
+        map['SubA'] = rng.choice(weapons['Sub_Weapons'])
+        for slot in ('MainB', 'SubB', 'MainC', 'SubC'):
+            map[slot] = '-'
+        map['RewardA'] = oead.S32(rng.randrange(100, 1000, 100))
+        map['RewardB'] = oead.S32(0)
+        map['RewardC'] = oead.S32(0)
+        map['Admission'] = oead.S32(rng.randrange(0, 500, 50))
+        info.append(map)
+
+    info_file = 'Mush/Octa2DMapInfo.byml'
+    container = nisasyst.NisasystContainer.fromDecrypted(info_file, oead.byml.to_binary(oead.byml.Array(info), False, 3))
+
+    map_info = [{'MapFileName': mapName(id), 'BGMType': f"BGM_Octa_{id % 9:02d}",
+                'FixTeamColor': f"Octa_{id % 6:02d}"} for id in range(MAP_COUNT)]
+
+    writer = oead.SarcWriter(oead.Endianness.Little)
+    writer.files[info_file] = bytes(container.repack())
+    writer.files['Mush/MapInfo.release.byml'] = oead.byml.to_binary(oead.byml.Array(map_info), False, 3)
+    for i in range(48):
+        filler = oead.byml.Array([{'Name': f"Filler{i}_{j}", 'Value': oead.S32(j)} for j in range(256)])
+        writer.files[f"Mush/Filler{i:02d}.byml"] = oead.byml.to_binary(filler, False, 3)
+    return bytes(writer.write()[1])
+
+
+def makeMapPack(objects: int, rng: random.Random) -> bytes:
+    """Returns a Map.pack with a map archive for every level"""
+
+    writer = oead.SarcWriter(oead.Endianness.Little)
+    for id in range(MAP_COUNT):
+        writer.files[f"Map/{mapName(id)}.szs"] = makeMapArchive(mapName(id), objects, rng)
+    return bytes(writer.write()[1])
+
+
+def buildRomFS(root: Path, objects: int = 400, seed: int = 0) -> Path:
+    """Writes the synthetic packs under root and returns root so it can be used as the Base RomFS Path
+
+    Parameters
+    ----------
+    root : Path
+        The folder to write the RomFS into
+    objects : int
+        The number of objects in each map, which decides how much work each map patch takes
+    seed : int
+        The seed for the filler data, so fixtures can be rebuilt exactly
+    """
+
+    rng = random.Random(seed)
+    pack_path = root / 'Pack'
+    pack_path.mkdir(parents=True, exist_ok=True)
+    (pack_path / 'Mush.release.pack').write_bytes(makeMushPack(rng))
+    (pack_path / 'Map.pack').write_bytes(makeMapPack(objects, rng))
+    return root
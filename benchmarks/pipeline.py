@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Times every stage of the randomizer and the file format primitives against a synthetic RomFS
+
+Usage: python -m benchmarks.pipeline [--objects N] [--repeat N] [--workers N] [--json results.json] [--compare old.json]
+
+Each measurement is repeated and both the fastest and median times are kept
+Results can be saved as JSON and compared against an older run to spot regressions"""
+
+from benchmarks.fixtures import buildRomFS, mapName
+from RandomizerCore.core import Randomizer
+import RandomizerCore.Tools.zs_tools as zs_tools
+import RandomizerCore.Tools.nisasyst as nisasyst
+import RandomizerCore.level_shuffle as level_shuffle
+import RandomizerCore.map_patches as map_patches
+from randomizer_paths import DATA_PATH
+from pathlib import Path
+import argparse, itertools, json, platform, random, statistics, sys, tempfile, time
+import oead, yaml
+
+
+SETTINGS = {
+    'Weapons': True,
+    'Levels': True,
+    'Thangs': True,
+    'Ink Color': True,
+    'Music': True,
+    'Enemy Ink Is Lava': True,
+    'Region': 'US',
+    'Platform': 'Emulator',
+}
+
+
+def measure(func, repeat: int, setup=None) -> dict:
+    """Runs func repeat times and returns its timings in seconds
+
+    If setup is given, it is called before every run outside of the timing and its result is passed to func"""
+
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg) if setup else func()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'runs': repeat}
+
+
+def benchStages(romfs: Path, out: Path, repeat: int, workers: int | None) -> dict:
+    """Times each stage of the randomizer, following the same steps as makeMod
+
+    Every run gets its own output folder and skips the vanilla cache, so nothing is reused from an earlier run"""
+
+    runs = itertools.count()
+
+    def newProcess():
+        settings = dict(SETTINGS, Base_RomFS_Path=str(romfs), Output_Path=str(out / str(next(runs))), Seed='benchmark')
+        settings['Vanilla Cache'] = False
+        if workers is not None:
+            settings['Workers'] = workers
+        process = Randomizer(settings)
+        random.seed(process.seed)
+        return process
+
+    def loadInfo(process):
+        process.pack = zs_tools.RawSARC.fromFile(romfs / 'Pack' / 'Mush.release.pack')
+        info_file = 'Mush/Octa2DMapInfo.byml'
+        process.container = nisasyst.NisasystContainer(info_file, process.pack.files[info_file])
+        process.map_data = zs_tools.BYAML(data=process.container.data, compressed=False)
+        return process
+
+    def defined():
+        process = loadInfo(newProcess())
+        process.defineLevels(process.map_data)
+        return process
+
+    def edited():
+        process = defined()
+        process.editLevels(process.map_data)
+        process.container.data = bytes(process.map_data.repack())
+        process.pack.files['Mush/Octa2DMapInfo.byml'] = process.container.repack()
+        process.aesthetics = zs_tools.BYAML(data=process.pack.files['Mush/MapInfo.release.byml'], compressed=False)
+        return process
+
+    def aesthetics():
+        process = edited()
+        process.randomizeAesthetics(process.aesthetics)
+        process.pack.files['Mush/MapInfo.release.byml'] = process.aesthetics.repack()
+        return process
+
+    results = {}
+    results['stage.load'] = measure(lambda: loadInfo(newProcess()).pack.close(), repeat)
+    results['stage.defineLevels'] = measure(lambda p: p.defineLevels(p.map_data), repeat, lambda: loadInfo(newProcess()))
+    results['stage.editLevels'] = measure(lambda p: p.editLevels(p.map_data), repeat, defined)
+    results['stage.randomizeAesthetics'] = measure(lambda p: p.randomizeAesthetics(p.aesthetics), repeat, edited)
+    # files are written in the background, so each stage waits for its writes to finish
+    results['stage.writeFile'] = measure(lambda p: (p.writeFile('Pack', 'Mush.release.pack', p.pack), p.output.flush()), repeat, aesthetics)
+    results['stage.editMapObjs'] = measure(lambda p: (p.editMapObjs(), p.output.flush()), repeat, edited)
+    results['stage.makeMod'] = measure(lambda p: p.makeMod(), repeat, newProcess)
+    return results
+
+
+def benchPrimitives(romfs: Path, repeat: int) -> dict:
+    """Times the zs_tools and nisasyst building blocks on the fixture data"""
+
+    map_pack = (romfs / 'Pack' / 'Map.pack').read_bytes()
+    mush_pack = (romfs / 'Pack' / 'Mush.release.pack').read_bytes()
+    map_szs = bytes(oead.Sarc(map_pack).get_file(f"Map/{mapName(0)}.szs").data)
+    map_sarc = bytes(zs_tools.zs_decompress(map_szs))
+    map_byml = bytes(oead.Sarc(map_sarc).get_file(f"{mapName(0)}.byaml").data)
+    info_file = 'Mush/Octa2DMapInfo.byml'
+    encrypted = bytes(oead.Sarc(mush_pack).get_file(info_file).data)
+    container = nisasyst.NisasystContainer(info_file, encrypted)
+
+    results = {}
+    results['yaz0.decompress'] = measure(lambda: zs_tools.zs_decompress(map_szs), repeat)
+    for profile in zs_tools.COMPRESSION_PROFILES:
+        results[f"yaz0.compress.{profile}"] = measure(lambda: zs_tools.zs_compress(map_sarc, profile), repeat)
+    results['sarc.parse'] = measure(lambda: zs_tools.SARC(map_pack), repeat)
+    results['sarc.repack'] = measure(lambda sarc: sarc.repack(), repeat, lambda: zs_tools.SARC(map_pack))
+    results['rawsarc.parse'] = measure(lambda: zs_tools.RawSARC(map_pack), repeat)
+    results['rawsarc.repack'] = measure(lambda sarc: sarc.repack(), repeat, lambda: zs_tools.RawSARC(map_pack))
+    results['byaml.parse'] = measure(lambda: zs_tools.BYAML(map_byml), repeat)
+    results['byaml.repack'] = measure(lambda byml: byml.repack(), repeat, lambda: zs_tools.BYAML(map_byml))
+    results['byaml.patch'] = measure(lambda: map_patches.applyPatches(map_byml, ('Enemy Ink Is Lava',)), repeat)
+    results['nisasyst.key'] = measure(lambda: nisasyst.getKeyIV.__wrapped__(info_file), repeat)
+    results['nisasyst.decrypt'] = measure(lambda: nisasyst.NisasystContainer(info_file, encrypted), repeat)
+    results['nisasyst.encrypt'] = measure(lambda: container.repack(), repeat)
+
+    with open(DATA_PATH / 'StageList.yml', 'r') as f:
+        layout = list(yaml.safe_load(f).values())
+    rng = random.Random(0)
+    results['shuffle.levels'] = measure(lambda: level_shuffle.shuffleLevels(layout, True, rng), repeat)
+    return results
+
+
+def printResults(results: dict, baseline: dict | None) -> None:
+    print(f"{'Benchmark':<30}{'Min (ms)':>12}{'Median (ms)':>14}" + (f"{'Change':>10}" if baseline else ''))
+    for name, result in results.items():
+        line = f"{name:<30}{result['min'] * 1000:>12.3f}{result['median'] * 1000:>14.3f}"
+        if baseline and name in baseline:
+            line += f"{(result['min'] / baseline[name]['min'] - 1) * 100:>+9.1f}%"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the randomizer against synthetic game files')
+    parser.add_argument('--objects', type=int, default=400, help='Number of objects in each synthetic map')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs per benchmark')
+    parser.add_argument('--workers', type=int, default=None, help='Map workers to use, defaults to the CPU count')
+    parser.add_argument('--json', type=Path, help='Save the results to this file')
+    parser.add_argument('--compare', type=Path, help='Show the change against results saved by an earlier run')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        romfs = buildRomFS(Path(temp) / 'romfs', args.objects)
+        results = benchPrimitives(romfs, args.repeat)
+        results.update(benchStages(romfs, Path(temp) / 'out', args.repeat, args.workers))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)['results']
+    printResults(results, baseline)
+
+    if args.json:
+        report = {
+            'meta': {
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'objects': args.objects,
+                'repeat': args.repeat,
+                'workers': args.workers,
+            },
+            'results': results,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
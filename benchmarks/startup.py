@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Reports how long the entry points of the randomizer take to import in a fresh interpreter
+
+Usage: python -m benchmarks.startup [--repeat N] [--top N]
+
+Each module is imported with python -X importtime in a new process, so nothing is cached between runs
+The slowest modules are listed by their cumulative import time, including everything they import"""
+
+import argparse, statistics, subprocess, sys
+
+ENTRY_POINTS = (
+    'RandomizerCore.core', # headless runs
+    'RandomizerCore.metro', # the Qt adapter
+    'RandomizerUI.window', # the GUI
+)
+
+
+def importTimes(module: str) -> dict:
+    """Imports a module in a new interpreter and returns {module: cumulative microseconds} for everything it loaded"""
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Report the import time of each randomizer entry point')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh imports per entry point')
+    parser.add_argument('--top', type=int, default=10, help='Number of the slowest modules to list')
+    args = parser.parse_args()
+
+    for module in ENTRY_POINTS:
+        runs = [importTimes(module) for _ in range(args.repeat)]
+        totals = [run[module] for run in runs]
+        print(f"{module}: min {min(totals) / 1000:.1f} ms, median {statistics.median(totals) / 1000:.1f} ms")
+
+        # top level modules only, since their cumulative times already include what they import
+        fastest = runs[totals.index(min(totals))]
+        slowest = sorted(((time, name) for name, time in fastest.items() if name != module and '.' not in name), reverse=True)
+        for time, name in slowest[:args.top]:
+            print(f"    {name:<40}{time / 1000:>10.1f} ms")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,6 @@
 #!/usr/bin/env python3
-from PySide6.QtCore import QTimer
-from PySide6.QtWidgets import QApplication
-from RandomizerUI.window import RandomizerWindow
 # from RandomizerCore.Paths.randomizer_paths import RESOURCE_PATH, RUNNING_FROM_SOURCE
-import sys
+import multiprocessing, sys
 
 def interruptHandler(sig, frame):
     sys.exit(0)
@@ -25,15 +22,24 @@ signal.signal(signal.SIGINT, interruptHandler)
 # if sys.platform == "darwin": # mac
 #     build_icon = "icon.icns"
 
-app = QApplication([])
-app.setStyle('fusion')
-# app.setWindowIcon(QtGui.QIcon(os.path.join(RESOURCE_PATH, build_icon)))
+# map workers are spawned as new processes, which re-import this module and need the frozen build to be handled
+# Qt is only imported past this point, so the workers never load it
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
 
-m = RandomizerWindow()
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    from RandomizerUI.window import RandomizerWindow
 
-# for keyboard interrupts
-timer = QTimer()
-timer.start(100)
-timer.timeout.connect(lambda: None)
+    app = QApplication([])
+    app.setStyle('fusion')
+    # app.setWindowIcon(QtGui.QIcon(os.path.join(RESOURCE_PATH, build_icon)))
 
-sys.exit(app.exec())
+    m = RandomizerWindow()
+
+    # for keyboard interrupts
+    timer = QTimer()
+    timer.start(100)
+    timer.timeout.connect(lambda: None)
+
+    sys.exit(app.exec())
@@ -7,7 +7,9 @@ a = Analysis(
     binaries=[],
     datas=[
         ('RandomizerCore/Data/StageList.yml', 'RandomizerCore/Data'),
-        ('RandomizerCore/Data/Weapons.yml', 'RandomizerCore/Data')
+        ('RandomizerCore/Data/Weapons.yml', 'RandomizerCore/Data'),
+        ('RandomizerCore/Data/KnownDumps.yml', 'RandomizerCore/Data'),
+        ('RandomizerCore/Data/MapPatches.yml', 'RandomizerCore/Data')
     ],
     hiddenimports=[],
     hookspath=[],
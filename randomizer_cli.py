@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Generates many seeds at once without the GUI
+
+Usage: python randomizer_cli.py SETTINGS [SEED ...] [--count N] [--workers N] [--romfs PATH] [--out PATH] [--dry-run]
+
+SETTINGS is a settings file in the same format the GUI saves to settings.txt
+The vanilla files are decoded once up front, then shared by every seed. Worker processes are forked from this one
+where the platform allows it, so they read the decoded files without copying them"""
+
+from RandomizerCore.core import Randomizer, preloadVanilla
+from RandomizerCore.Tools.vanilla_cache import VanillaCache
+from RandomizerCore.Tools.staged_output import waitForRemovals
+from randomizer_paths import CACHE_PATH
+from pathlib import Path
+import argparse, functools, multiprocessing, os, random, statistics, string, sys, time
+import yaml
+
+_vanilla = None # the shared vanilla cache, set before workers are forked so they inherit it
+
+
+def createSeed() -> str:
+    """Returns a random 32-length string of ascii letters, like the GUI does for blank seeds"""
+
+    return ''.join(random.choices(string.ascii_letters, k=32))
+
+
+def loadVanilla(romfs: Path, use_disk_cache: bool, maps: bool = True) -> None:
+    global _vanilla
+    if _vanilla is None:
+        _vanilla = VanillaCache(romfs, CACHE_PATH, enabled=use_disk_cache, in_memory=True)
+        preloadVanilla(_vanilla, romfs, maps)
+
+
+def runSeed(settings: dict, seed: str) -> dict:
+    """Generates one seed and returns how it went"""
+
+    errors = []
+    reports = []
+    randomizer = Randomizer(dict(settings, Seed=seed), on_error=errors.append, on_report=reports.append, vanilla_cache=_vanilla)
+    start = time.perf_counter()
+    randomizer.run()
+    wall = time.perf_counter() - start
+    # pool workers are terminated once the batch is done, which would cut the removal of the old seed folder short
+    waitForRemovals()
+
+    written = 0
+    if reports:
+        written = reports[-1]['totals'].get('write', {}).get('bytes_written', 0)
+    return {'seed': seed, 'wall': wall, 'bytes_written': written, 'error': errors[0] if errors else None}
+
+
+def runBatch(settings: dict, seeds: list, workers: int, vanilla: tuple) -> list:
+    """Generates every seed, spread over the given number of worker processes, which each load the vanilla files with loadVanilla(*vanilla)"""
+
+    if workers <= 1:
+        return [reportSeed(runSeed(settings, seed)) for seed in seeds]
+
+    # fork shares the decoded files copy-on-write, while spawned workers have to decode them again once each
+    method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    context = multiprocessing.get_context(method)
+    with context.Pool(workers, loadVanilla, vanilla) as pool:
+        return [reportSeed(result) for result in pool.imap(functools.partial(runSeed, settings), seeds)]
+
+
+def reportSeed(result: dict) -> dict:
+    status = 'failed' if result['error'] else 'done'
+    print(f"{result['seed']}: {status} in {result['wall']:.2f}s", flush=True)
+    return result
+
+
+def printSummary(results: list, wall: float, load: float) -> None:
+    failed = [result for result in results if result['error']]
+    times = [result['wall'] for result in results]
+    print()
+    print(f"Seeds: {len(results)}, failed: {len(failed)}")
+    print(f"Loading the vanilla files: {load:.2f}s")
+    print(f"Total: {wall:.2f}s, {len(results) / wall:.2f} seeds/s")
+    if times:
+        print(f"Per seed: min {min(times):.2f}s, median {statistics.median(times):.2f}s, max {max(times):.2f}s")
+    print(f"Written: {sum(result['bytes_written'] for result in results) / 1024 / 1024:.1f} MiB")
+    for result in failed:
+        print(f"\n{result['seed']} failed:\n{result['error']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate seeds without the GUI')
+    parser.add_argument('settings', type=Path, help='Settings file, in the format the GUI saves')
+    parser.add_argument('seeds', nargs='*', help='Seeds to generate')
+    parser.add_argument('--count', type=int, default=0, help='Number of random seeds to generate, on top of any given seeds')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Seeds to generate at once, defaults to the CPU count')
+    parser.add_argument('--romfs', type=Path, help='Base RomFS path, overriding the settings file')
+    parser.add_argument('--out', type=Path, help='Output path, overriding the settings file')
+    parser.add_argument('--dry-run', action='store_true', help='Only write the spoiler log of each seed, to a SEED.dry-run folder')
+    args = parser.parse_args()
+
+    with open(args.settings, 'r') as f:
+        settings = yaml.safe_load(f)
+    if args.romfs:
+        settings['Base_RomFS_Path'] = str(args.romfs)
+    if args.out:
+        settings['Output_Path'] = str(args.out)
+
+    romfs = Path(settings['Base_RomFS_Path'])
+    if (romfs / 'romfs').exists():
+        romfs = romfs / 'romfs'
+    settings['Base_RomFS_Path'] = str(romfs)
+    if args.dry_run:
+        settings['Dry Run'] = True
+
+    # seeds run side by side instead of each one starting its own map workers
+    settings['Workers'] = 1
+    settings.pop('Seed', None)
+    seeds = args.seeds + [createSeed() for _ in range(args.count)]
+    if not seeds:
+        parser.error('give at least one seed or a --count')
+
+    # dry runs never touch the maps, so only the level info is decoded, and the dump is not fingerprinted for the disk cache
+    dry_run = settings.get('Dry Run', False)
+    vanilla = (romfs, settings.get('Vanilla Cache', True) and not dry_run, not dry_run)
+    start = time.perf_counter()
+    loadVanilla(*vanilla)
+    load = time.perf_counter() - start
+    results = runBatch(settings, seeds, min(args.workers, len(seeds)), vanilla)
+    printSummary(results, time.perf_counter() - start, load)
+    sys.exit(1 if any(result['error'] for result in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -23,3 +23,4 @@ except ImportError:
 
 DATA_PATH = ROOT_PATH / 'RandomizerCore' / 'Data'
 RESOURCE_PATH = ROOT_PATH / 'RandomizerUI' / 'Resources'
+CACHE_PATH = Path(appdirs.user_data_dir('randomizer', 'Splatoon 3 Randomizer')) / 'cache'
@@ -0,0 +1,55 @@
+"""Tests for the build cache, which decides which files of a seed folder are built again"""
+
+from RandomizerCore.Tools.build_cache import BuildCache
+
+
+def makeRun(root, keys: dict) -> BuildCache:
+    """Does a run that writes every file with its key and saves the keys, like the randomizer does"""
+
+    cache = BuildCache(root)
+    for name, key in keys.items():
+        file = root / name
+        if not cache.reuse(file, key):
+            file.parent.mkdir(parents=True, exist_ok=True)
+            file.write_text(key)
+    cache.save(root / 'build.json')
+    return cache
+
+
+def testReuseSameKey(tmp_path):
+    makeRun(tmp_path, {'romfs/Pack/Map.pack': 'a', 'romfs/Pack/Mush.release.pack': 'b'})
+    cache = BuildCache(tmp_path)
+    assert cache.reuse(tmp_path / 'romfs/Pack/Map.pack', 'a')
+    assert not cache.reuse(tmp_path / 'romfs/Pack/Mush.release.pack', 'changed')
+    assert cache.current == {'romfs/Pack/Map.pack': 'a', 'romfs/Pack/Mush.release.pack': 'changed'}
+
+
+def testNoReuseWithoutFile(tmp_path):
+    makeRun(tmp_path, {'romfs/Pack/Map.pack': 'a'})
+    (tmp_path / 'romfs/Pack/Map.pack').unlink()
+    assert not BuildCache(tmp_path).reuse(tmp_path / 'romfs/Pack/Map.pack', 'a')
+
+
+def testDroppedFilesForgotten(tmp_path):
+    makeRun(tmp_path, {'romfs/Pack/Map.pack': 'a', 'romfs/Pack/Mush.release.pack': 'b'})
+    makeRun(tmp_path, {'romfs/Pack/Map.pack': 'a'})
+    assert not BuildCache(tmp_path).reuse(tmp_path / 'romfs/Pack/Mush.release.pack', 'b')
+
+
+def testUnreadableKeys(tmp_path):
+    (tmp_path / 'build.json').write_text('{not json')
+    (tmp_path / 'Map.pack').write_text('a')
+    cache = BuildCache(tmp_path)
+    assert cache.previous == {}
+    assert not cache.reuse(tmp_path / 'Map.pack', 'a')
+
+
+def testKeyDependsOnEveryInput(tmp_path):
+    file = tmp_path / 'Map.pack'
+    file.write_bytes(b'vanilla')
+    key = BuildCache.key('seed', {'Levels': True}, BuildCache.stamp(file))
+    assert key == BuildCache.key('seed', {'Levels': True}, BuildCache.stamp(file))
+    assert key != BuildCache.key('other', {'Levels': True}, BuildCache.stamp(file))
+    assert key != BuildCache.key('seed', {'Levels': False}, BuildCache.stamp(file))
+    file.write_bytes(b'vanilla, but longer')
+    assert key != BuildCache.key('seed', {'Levels': True}, BuildCache.stamp(file))
@@ -0,0 +1,60 @@
+"""Tests for BYAMLPatch, checked against full repacks by oead"""
+
+from benchmarks.fixtures import makeObj
+import RandomizerCore.Tools.zs_tools as zs_tools
+import random
+import oead
+import pytest
+
+
+def makeMap(objects: int = 20) -> oead.byml.Hash:
+    """Returns a map document laid out like the vanilla ones"""
+
+    rng = random.Random(0)
+    return oead.byml.Hash({
+        'FilePath': 'Fld_Test',
+        'Objs': oead.byml.Array([makeObj(i, rng) for i in range(objects)]),
+        'Rails': oead.byml.Array([]),
+    })
+
+
+@pytest.mark.parametrize('big_endian', [False, True])
+def testBYAMLPatchMatchesFullRepack(big_endian):
+    doc = makeMap()
+    data = oead.byml.to_binary(doc, big_endian, 3)
+
+    # one object reuses every existing string, the other adds new ones to the string table
+    rng = random.Random(1)
+    added = [makeObj(100, rng), makeObj(101, rng)]
+    added[1]['UnitConfigName'] = 'Obj_NotInTheFile'
+    added[1]['LayerConfigName'] = 'AlsoNew'
+
+    patch = zs_tools.BYAMLPatch(data)
+    for obj in added:
+        patch.append('Objs', obj)
+    patched = patch.repack()
+
+    for obj in added:
+        doc['Objs'].append(obj)
+    assert patched[:2] == (b'BY' if big_endian else b'YB')
+    assert oead.byml.to_text(oead.byml.from_binary(patched)) == oead.byml.to_text(doc)
+
+
+def testBYAMLPatchAppendsToEmptyArray():
+    doc = makeMap()
+    patch = zs_tools.BYAMLPatch(oead.byml.to_binary(doc, False, 3))
+    patch.append('Rails', {'Id': 'rail0', 'IsLinkDest': True})
+
+    doc['Rails'].append({'Id': 'rail0', 'IsLinkDest': True})
+    assert oead.byml.to_text(oead.byml.from_binary(patch.repack())) == oead.byml.to_text(doc)
+
+
+def testBYAMLPatchRejectsNewKeys():
+    patch = zs_tools.BYAMLPatch(oead.byml.to_binary(makeMap(), False, 3))
+    patch.append('Objs', {'KeyNotInTheFile': oead.S32(1)})
+    with pytest.raises(KeyError):
+        patch.repack()
+    with pytest.raises(KeyError):
+        patch.append('Missing', {})
+    with pytest.raises(ValueError):
+        patch.append('FilePath', {})
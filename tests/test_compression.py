@@ -0,0 +1,30 @@
+"""Round trip tests for the Yaz0 compression profiles, checked by decompressing their output with oead"""
+
+import RandomizerCore.Tools.zs_tools as zs_tools
+import random
+import oead
+import pytest
+
+
+@pytest.mark.parametrize('size', [0, 1, 7, 8, 9, 4096, 100003])
+def testYaz0StoreRoundTrip(size):
+    data = random.Random(size).randbytes(size)
+    stored = zs_tools.yaz0_store(data)
+    assert bytes(oead.yaz0.decompress(stored)) == data
+    assert bytes(zs_tools.zs_compress(data, 'store')) == stored
+
+
+@pytest.mark.parametrize('profile', list(zs_tools.COMPRESSION_PROFILES))
+def testProfilesRoundTrip(profile):
+    # repeated data, so that every profile but store has something to compress
+    data = bytes(range(256)) * 40 + random.Random(0).randbytes(1000)
+    compressed = zs_tools.zs_compress(data, profile)
+    assert bytes(compressed[:4]) == b'Yaz0'
+    assert bytes(zs_tools.zs_decompress(compressed)) == data
+    if profile != 'store':
+        assert len(compressed) < len(data)
+
+
+def testUnknownProfile():
+    with pytest.raises(KeyError):
+        zs_tools.zs_compress(b'data', 'fastest')
@@ -0,0 +1,81 @@
+"""Tests for how a run of the randomizer ends, run on a small synthetic RomFS"""
+
+from benchmarks.fixtures import buildRomFS
+from benchmarks.pipeline import SETTINGS
+from RandomizerCore.core import Randomizer
+from RandomizerCore.Tools.staged_output import waitForRemovals
+from randomizer_paths import ROOT_PATH
+import subprocess, sys
+import pytest
+
+# cancels the run the first time it waits on the map workers, so the cancel always lands while maps are in flight
+CANCEL_SCRIPT = '''
+from benchmarks.pipeline import SETTINGS
+from RandomizerCore.core import Randomizer
+import concurrent.futures, sys
+
+romfs, out, low_memory = sys.argv[1:]
+randomizer = Randomizer(dict(SETTINGS, Base_RomFS_Path=romfs, Output_Path=out, Seed='cancel', Workers=4,
+                             **{'Low Memory': low_memory == 'True', 'Vanilla Cache': False}))
+real_wait = concurrent.futures.wait
+
+def cancelOnWait(*args, **kwargs):
+    randomizer.stop()
+    return real_wait(*args, **kwargs)
+
+concurrent.futures.wait = cancelOnWait
+randomizer.run()
+print('returned')
+'''
+
+
+@pytest.fixture(scope='module')
+def romfs(tmp_path_factory):
+    # the maps have to be larger than a pipe buffer, or the pool never blocks sending them to a worker
+    return buildRomFS(tmp_path_factory.mktemp('romfs'), 1500)
+
+
+@pytest.mark.parametrize('low_memory', [False, True])
+def testCancelMidPoolExits(romfs, tmp_path, low_memory):
+    command = [sys.executable, '-c', CANCEL_SCRIPT, str(romfs), str(tmp_path), str(low_memory)]
+    done = subprocess.run(command, cwd=ROOT_PATH, capture_output=True, text=True, timeout=60)
+    assert done.returncode == 0, done.stderr
+    assert 'returned' in done.stdout
+    assert not (tmp_path / 'cancel').exists()
+
+
+@pytest.fixture(scope='module')
+def small_romfs(tmp_path_factory):
+    return buildRomFS(tmp_path_factory.mktemp('small_romfs'), 20)
+
+
+def runSeed(romfs, out, **settings) -> list:
+    """Runs the seed 'test' with every option on and returns the errors it reported"""
+
+    errors = []
+    randomizer = Randomizer(dict(SETTINGS, Base_RomFS_Path=str(romfs), Output_Path=str(out), Seed='test', **settings),
+                            on_error=errors.append)
+    randomizer.run()
+    waitForRemovals()
+    return errors
+
+
+def testProfileOnlyKeptForFinishedRuns(small_romfs, tmp_path):
+    assert not runSeed(small_romfs, tmp_path, Profile=True)
+    assert {file.name for file in (tmp_path / 'test' / 'profile').iterdir()} == {'profile.prof', 'profile.txt'}
+
+    # the next run that is not profiled drops the old profile
+    assert not runSeed(small_romfs, tmp_path)
+    assert not (tmp_path / 'test' / 'profile').exists()
+
+    # a failed run leaves the seed folder as it was
+    (tmp_path / 'broken' / 'Pack').mkdir(parents=True)
+    (tmp_path / 'broken' / 'Pack' / 'Mush.release.pack').write_bytes((small_romfs / 'Pack' / 'Mush.release.pack').read_bytes())
+    assert runSeed(tmp_path / 'broken', tmp_path, Profile=True)
+    assert not (tmp_path / 'test' / 'profile').exists()
+
+
+def testDryRunProfile(small_romfs, tmp_path):
+    assert not runSeed(small_romfs, tmp_path, Profile=True, **{'Dry Run': True})
+    assert (tmp_path / 'test.dry-run' / 'profile' / 'profile.prof').is_file()
+    assert not (tmp_path / 'test').exists()
@@ -0,0 +1,158 @@
+"""Tests for the event flow helpers, run on flowcharts built and written by evfl"""
+
+import RandomizerCore.Tools.event_tools as event_tools
+import RandomizerCore.Tools.zs_tools as zs_tools
+import evfl, oead
+import pytest
+from evfl.common import StringHolder
+from evfl.entry_point import EntryPoint
+from evfl.util import make_index, make_rindex
+from functools import partial
+
+
+def makeEvent(name: str, actor: evfl.Actor, nxt=None) -> evfl.Event:
+    """Returns an action event that runs the first action of the actor, then goes on to the next event"""
+
+    event = evfl.Event()
+    event.name = name
+    event.data = evfl.ActionEvent()
+    event.data.actor = make_rindex(actor)
+    event.data.actor_action = make_rindex(actor.actions[0])
+    event.data.nxt = make_index(nxt)
+    return event
+
+
+def makeFlow(events: int = 10) -> bytes:
+    """Returns a flow with a chain of events, which starts at the entry point Start"""
+
+    actor = evfl.Actor()
+    actor.identifier = evfl.ActorIdentifier('EventSystemActor')
+    actor.actions.append(StringHolder('Demo_Wait'))
+
+    chain = []
+    for i in reversed(range(events)):
+        chain.insert(0, makeEvent(f"Event{i}", actor, chain[0] if chain else None))
+
+    flow = evfl.EventFlow()
+    flow.name = 'Test'
+    flow.flowchart = evfl.Flowchart()
+    flow.flowchart.name = 'Test'
+    flow.flowchart.actors.append(actor)
+    flow.flowchart.events.extend(chain)
+    entry_point = EntryPoint('Start')
+    entry_point.main_event = make_index(chain[0])
+    flow.flowchart.entry_points.append(entry_point)
+    return event_tools.writeFlow(flow)
+
+
+def chainFrom(flowchart: evfl.Flowchart, entry_point: str) -> list:
+    """Returns the names of the events that run from the entry point, in order"""
+
+    names = []
+    event = event_tools.findEntryPoint(flowchart, entry_point).main_event.v
+    while event is not None:
+        names.append(event.name)
+        event = event.data.nxt.v
+    return names
+
+
+def insertAll(flowchart, count: int) -> None:
+    """Adds new events and links each one after an existing event, like the randomizer's flow edits do
+
+    An IndexedFlowchart is edited through its methods, and a plain flowchart through the module level functions"""
+
+    if isinstance(flowchart, event_tools.IndexedFlowchart):
+        actor = flowchart.flowchart.actors[0]
+        find, add, insert = flowchart.findEvent, flowchart.addEvent, flowchart.insertEventAfter
+    else:
+        actor = flowchart.actors[0]
+        find, add, insert = partial(event_tools.findEvent, flowchart), flowchart.events.append, partial(event_tools.insertEventAfter, flowchart)
+    for i in range(count):
+        event = makeEvent(f"New{i}", actor, find(f"Event{i + 1}"))
+        add(event)
+        insert(f"Event{i}", event.name)
+
+
+def testIndexedFlowchartLookups():
+    flow = event_tools.readFlow(makeFlow())
+    indexed = event_tools.IndexedFlowchart(flow.flowchart)
+    assert indexed.findEvent('Event3') is event_tools.findEvent(flow.flowchart, 'Event3')
+    assert indexed.findEntryPoint('Start') is event_tools.findEntryPoint(flow.flowchart, 'Start')
+    assert indexed.findEvent('Missing') is None
+    assert not indexed.insertEventAfter('Missing', 'Event3')
+
+
+def testBatchedInsertsRoundTrip():
+    flow = event_tools.readFlow(makeFlow(50))
+    indexed = event_tools.IndexedFlowchart(flow.flowchart)
+    with indexed.batch():
+        insertAll(indexed, 49)
+        # nothing is resolved until the batch ends
+        assert indexed.pending
+    # every reference the wrapper linked has the index of its event once the batch is over
+    for event in flow.flowchart.events[:49]:
+        nxt = event.data.nxt
+        assert nxt.v.name.startswith('New')
+        assert nxt._idx == flow.flowchart.events.index(nxt.v)
+
+    # the new events run between the old ones after writing and reading the flow back
+    expected = [name for i in range(49) for name in (f"Event{i}", f"New{i}")] + ['Event49']
+    assert chainFrom(event_tools.readFlow(event_tools.writeFlow(flow)).flowchart, 'Start') == expected
+
+
+def testIndexedMatchesModuleFunctions():
+    # the same edits made through the wrapper and through the module level functions write the same bytes
+    plain = event_tools.readFlow(makeFlow(20))
+    insertAll(plain.flowchart, 19)
+
+    flow = event_tools.readFlow(makeFlow(20))
+    indexed = event_tools.IndexedFlowchart(flow.flowchart)
+    with indexed.batch():
+        insertAll(indexed, 19)
+    assert event_tools.writeFlow(flow) == event_tools.writeFlow(plain)
+
+
+def testEntryPointInsert():
+    flow = event_tools.readFlow(makeFlow(3))
+    indexed = event_tools.IndexedFlowchart(flow.flowchart)
+    indexed.addEvent(makeEvent('First', flow.flowchart.actors[0], indexed.findEvent('Event0')))
+    assert indexed.insertEventAfter('Start', 'First')
+    assert chainFrom(event_tools.readFlow(event_tools.writeFlow(flow)).flowchart, 'Start') == ['First', 'Event0', 'Event1', 'Event2']
+
+
+def addFirst(flow: evfl.EventFlow) -> None:
+    """Runs a new event before the rest of the flow. This is at module level so workers can unpickle it"""
+
+    indexed = event_tools.IndexedFlowchart(flow.flowchart)
+    indexed.addEvent(makeEvent('First', flow.flowchart.actors[0], indexed.findEntryPoint('Start').main_event.v))
+    indexed.insertEventAfter('Start', 'First')
+
+
+def makePack(flows: int) -> bytes:
+    """Returns a SARC with a flow of a different length in each file, next to a file that is not a flow"""
+
+    writer = oead.SarcWriter()
+    for i in range(flows):
+        writer.files[f"EventFlow/Flow{i}.bfevfl"] = makeFlow(i + 2)
+    writer.files['Other.bin'] = b'not a flow'
+    return bytes(writer.write()[1])
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('raw', [False, True])
+def testEditFlows(raw, workers):
+    data = makePack(4)
+    edits = {f"EventFlow/Flow{i}.bfevfl": addFirst for i in range(3)}
+
+    sarc = zs_tools.RawSARC(data) if raw else zs_tools.SARC(data)
+    event_tools.editFlows(sarc, edits, workers)
+    repacked = sarc.repack()
+    if raw:
+        sarc.close()
+
+    reader = oead.Sarc(repacked)
+    assert bytes(reader.get_file('Other.bin').data) == b'not a flow'
+    for i in range(4):
+        flow = event_tools.readFlow(reader.get_file(f"EventFlow/Flow{i}.bfevfl").data)
+        chain = [f"Event{n}" for n in range(i + 2)]
+        assert chainFrom(flow.flowchart, 'Start') == (['First'] + chain if i < 3 else chain)
@@ -0,0 +1,54 @@
+"""Tests for the level shuffle, run on the vanilla layout from StageList.yml"""
+
+from RandomizerCore.level_shuffle import shuffleLevels, THANG_IDS
+from randomizer_paths import DATA_PATH
+import random
+import pytest
+import yaml
+
+
+@pytest.fixture(scope='module')
+def layout():
+    with open(DATA_PATH / 'StageList.yml', 'r') as f:
+        return list(yaml.safe_load(f).values())
+
+
+def placed(layout: list, mapping: dict) -> list:
+    """Returns the new level ID of every slot, line by line"""
+
+    return [[mapping[id] for id in line] for line in layout]
+
+
+@pytest.mark.parametrize('shuffle_thangs', [False, True])
+@pytest.mark.parametrize('seed', range(20))
+def testEveryLevelPlacedOnce(layout, shuffle_thangs, seed):
+    mapping = shuffleLevels(layout, shuffle_thangs, random.Random(seed))
+    ids = sorted(id for line in layout for id in line)
+    assert sorted(mapping) == ids
+    assert sorted(mapping.values()) == ids
+
+
+@pytest.mark.parametrize('seed', range(20))
+def testThangsKeepVanillaSlots(layout, seed):
+    mapping = shuffleLevels(layout, False, random.Random(seed))
+    for vanilla_line, line in zip(layout, placed(layout, mapping)):
+        for vanilla, new in zip(vanilla_line, line):
+            assert (new == vanilla) if vanilla in THANG_IDS else (new not in THANG_IDS)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def testShuffledThangsAtLineEnds(layout, seed):
+    lines = placed(layout, shuffleLevels(layout, True, random.Random(seed)))
+    thang_lines = [line for line in lines if set(line) & set(THANG_IDS)]
+    assert len(thang_lines) == len(THANG_IDS) # one thang per line at most
+    for line in thang_lines:
+        assert all(id not in THANG_IDS for id in line[1:-1])
+
+
+def testSameSeedSameLayout(layout):
+    assert shuffleLevels(layout, True, random.Random('seed')) == shuffleLevels(layout, True, random.Random('seed'))
+
+
+def testTooManyThangs():
+    with pytest.raises(ValueError):
+        shuffleLevels([[80, 1], [81, 2]], True, random.Random(0), thang_ids=(80, 81, 1))
@@ -0,0 +1,108 @@
+"""Tests for selecting and applying the map patch sets, checked by parsing the patched maps with oead"""
+
+from benchmarks.fixtures import makeObj
+import RandomizerCore.map_patches as map_patches
+import random
+import oead
+import pytest
+
+TEST_PATCHES = '''
+Add Only:
+  Add:
+    - {Id: Added, UnitConfigName: Obj_InkRail}
+
+Remove And Modify:
+  Setting: Edit
+  Remove:
+    - {UnitConfigName: Obj_Sponge}
+  Modify:
+    - Match: {UnitConfigName: Obj_Goal}
+      Set: {Team: 2, Scale: {X: 2.0, Y: 2.0, Z: 2.0}}
+  Add:
+    - {Id: AddedAfterEdit, UnitConfigName: Obj_Goal}
+
+Jetpack Maps:
+  Special: Jetpack
+  Maps: [Fld_Octa_001]
+'''
+
+
+@pytest.fixture
+def patches(tmp_path, monkeypatch):
+    """Swaps MapPatches.yml for the test patch sets"""
+
+    path = tmp_path / 'MapPatches.yml'
+    path.write_text(TEST_PATCHES)
+    monkeypatch.setattr(map_patches, 'PATCHES_PATH', path)
+    map_patches.loadPatches.cache_clear()
+    yield
+    map_patches.loadPatches.cache_clear()
+
+
+def makeMap() -> oead.byml.Hash:
+    # the add only objects use keys that are all in the map already, so they can be written straight into it
+    rng = random.Random(0)
+    return oead.byml.Hash({'Objs': oead.byml.Array([makeObj(i, rng) for i in range(30)]), 'Rails': oead.byml.Array([])})
+
+
+def objs(data) -> list:
+    return list(oead.byml.from_binary(data)['Objs'])
+
+
+def testVanillaPatchesLoad():
+    map_patches.loadPatches.cache_clear()
+    assert 'Enemy Ink Is Lava' in map_patches.loadPatches()
+    assert map_patches.selectPatches('Fld_Octa_001', {'Enemy Ink Is Lava': True}, 'Jetpack') \
+        == ('Enemy Ink Is Lava', 'Special Setter Jetpack')
+    assert map_patches.selectPatches('Fld_Octa_001', {'Enemy Ink Is Lava': False}, None) == ()
+
+
+def testSelectPatches(patches):
+    assert map_patches.selectPatches('Fld_Octa_002', {}, None) == ('Add Only',)
+    assert map_patches.selectPatches('Fld_Octa_002', {'Edit': True}, 'Jetpack') == ('Add Only', 'Remove And Modify')
+    assert map_patches.selectPatches('Fld_Octa_001', {'Edit': False}, 'Jetpack') == ('Add Only', 'Jetpack Maps')
+
+
+def testAddOnlyIsAppended(patches):
+    doc = makeMap()
+    data, method = map_patches.applyPatches(oead.byml.to_binary(doc, False, 3), ('Add Only',))
+    assert method == 'patch'
+    assert objs(data)[:-1] == list(doc['Objs'])
+    assert dict(objs(data)[-1]) == {'Id': 'Added', 'UnitConfigName': 'Obj_InkRail'}
+
+
+def testAddWithNewKeyFallsBack(patches):
+    # none of the keys of the new object are in this map yet, so it cannot be appended in place and is repacked instead
+    doc = oead.byml.Hash({'Objs': oead.byml.Array([{'Team': oead.S32(0)}])})
+    data, method = map_patches.applyPatches(oead.byml.to_binary(doc, False, 3), ('Add Only',))
+    assert method == 'repack'
+    doc['Objs'].append({'Id': 'Added', 'UnitConfigName': 'Obj_InkRail'})
+    assert oead.byml.to_text(oead.byml.from_binary(data)) == oead.byml.to_text(doc)
+
+
+def testRemoveAndModifyRepack(patches):
+    doc = makeMap()
+    data, method = map_patches.applyPatches(oead.byml.to_binary(doc, False, 3), ('Add Only', 'Remove And Modify'))
+    assert method == 'repack'
+
+    expected = [obj for obj in doc['Objs'] if obj['UnitConfigName'] != 'Obj_Sponge']
+    patched = objs(data)
+    assert [obj['Id'] for obj in patched] == [obj['Id'] for obj in expected] + ['Added', 'AddedAfterEdit']
+    for obj in patched[:-2]:
+        if obj['UnitConfigName'] == 'Obj_Goal':
+            assert obj['Team'] == oead.S32(2)
+            assert obj['Scale']['X'] == oead.F32(2.0)
+    assert any(obj['UnitConfigName'] == 'Obj_Goal' for obj in patched[:-2])
+    assert len(expected) < len(doc['Objs'])
+
+
+def testUnknownFields(tmp_path, monkeypatch):
+    path = tmp_path / 'MapPatches.yml'
+    path.write_text('Typo:\n  Ad: []\n')
+    monkeypatch.setattr(map_patches, 'PATCHES_PATH', path)
+    map_patches.loadPatches.cache_clear()
+    try:
+        with pytest.raises(KeyError):
+            map_patches.loadPatches()
+    finally:
+        map_patches.loadPatches.cache_clear()
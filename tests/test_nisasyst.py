@@ -0,0 +1,58 @@
+"""Round trip tests for the nisasyst encryption, checked by parsing the decrypted output with oead"""
+
+import RandomizerCore.Tools.nisasyst as nisasyst
+import random
+import oead
+import pytest
+
+INFO_FILE = 'Mush/Octa2DMapInfo.byml'
+
+
+@pytest.mark.parametrize('size', [0, 1, 15, 16, 17, 1000])
+def testRepackRoundTrip(size):
+    data = random.Random(size).randbytes(size)
+    encrypted = bytes(nisasyst.NisasystContainer.fromDecrypted(INFO_FILE, data).repack())
+    assert encrypted.endswith(b'nisasyst')
+    assert (len(encrypted) - 8) % 16 == 0
+
+    # the data is padded to the AES block size with zeros, which stay on the end after decrypting
+    decrypted = bytes(nisasyst.NisasystContainer(INFO_FILE, encrypted).data)
+    assert decrypted[:size] == data
+    assert decrypted[size:] == bytes(len(decrypted) - size)
+
+
+def testRepackedBYAMLParses():
+    doc = oead.byml.Array([{'MapName': f"Fld_Octa_{i:03d}", 'UIID': oead.S32(i)} for i in range(10)])
+    container = nisasyst.NisasystContainer.fromDecrypted(INFO_FILE, oead.byml.to_binary(doc, False, 3))
+    decrypted = nisasyst.NisasystContainer(INFO_FILE, container.repack()).data
+    assert oead.byml.to_text(oead.byml.from_binary(decrypted)) == oead.byml.to_text(doc)
+
+
+def testKeysDependOnName():
+    data = bytes(32)
+    first = nisasyst.NisasystContainer.fromDecrypted(INFO_FILE, data).repack()
+    second = nisasyst.NisasystContainer.fromDecrypted('Mush/MapInfo.release.byml', data).repack()
+    assert first != second
+    with pytest.raises(ValueError):
+        nisasyst.NisasystContainer(INFO_FILE, data)
+
+
+def testKnownKeyAndCiphertext():
+    # worked out with the original per-call key derivation, before getKeyIV was cached
+    key, iv = nisasyst.getKeyIV(INFO_FILE)
+    assert key.hex() == '14d91124351a2161a414fd0273edfbe5'
+    assert iv.hex() == '75f8aca51be31f77e507d6434676c9b3'
+    encrypted = nisasyst.NisasystContainer.fromDecrypted(INFO_FILE, bytes(range(32))).repack()
+    assert encrypted.hex() == 'bfdf66571212616a0dfb1a3fb753b69c70b30f7792752f0321b9458397ad9a23' + b'nisasyst'.hex()
+
+
+def testDecryptAllSkipsPlainFiles():
+    files = {INFO_FILE: nisasyst.NisasystContainer.fromDecrypted(INFO_FILE, bytes(20)).repack(), 'Plain.byml': b'YB\x03\x00'}
+    containers = nisasyst.decryptAll(files)
+    assert list(containers) == [INFO_FILE]
+    assert bytes(containers[INFO_FILE].data[:20]) == bytes(20)
+
+    containers[INFO_FILE].data[:4] = b'edit'
+    nisasyst.encryptAll(files, containers)
+    assert files['Plain.byml'] == b'YB\x03\x00'
+    assert bytes(nisasyst.NisasystContainer(INFO_FILE, files[INFO_FILE]).data[:4]) == b'edit'
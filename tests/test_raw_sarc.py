@@ -0,0 +1,93 @@
+"""Tests for RawSARC, checked against archives written and parsed by oead"""
+
+import RandomizerCore.Tools.nisasyst as nisasyst
+import RandomizerCore.Tools.zs_tools as zs_tools
+import random
+import oead
+import pytest
+
+
+def makeSARC(endianness, sizes: list) -> bytes:
+    """Returns a SARC written by oead holding one file of each size"""
+
+    rng = random.Random(0)
+    writer = oead.SarcWriter(endianness)
+    for i, size in enumerate(sizes):
+        writer.files[f"Dir/File{i:02d}.bin"] = rng.randbytes(size)
+    return bytes(writer.write()[1])
+
+
+@pytest.mark.parametrize('endianness', [oead.Endianness.Little, oead.Endianness.Big])
+def testRawSARCReadsFiles(endianness):
+    data = makeSARC(endianness, [0, 1, 3, 16, 100, 0x2001, 5])
+    expected = {file.name: bytes(file.data) for file in oead.Sarc(data).get_files()}
+    with zs_tools.RawSARC(data) as sarc:
+        assert {name: bytes(view) for name, view in sarc.files.items()} == expected
+        assert sarc.repack() == data
+
+
+def testRawSARCRejectsAddedFiles():
+    with zs_tools.RawSARC(makeSARC(oead.Endianness.Little, [10])) as sarc:
+        sarc.files['New.bin'] = b'new'
+        with pytest.raises(KeyError):
+            sarc.repack()
+
+
+def testRawSARCRetainedUntilLastClose(tmp_path):
+    path = tmp_path / 'Test.pack'
+    path.write_bytes(makeSARC(oead.Endianness.Little, [10]))
+    sarc = zs_tools.RawSARC.fromFile(path).retain()
+    sarc.close()
+    assert not sarc.file_map.closed
+    sarc.close()
+    assert sarc.file_map.closed
+
+
+def testRawSARCKeepsRaisedError(tmp_path):
+    # the decrypt fails with a view of the file still alive in its frame, which must not turn into a BufferError on close
+    writer = oead.SarcWriter()
+    writer.files['Mush/Octa2DMapInfo.byml'] = oead.byml.to_binary(oead.byml.Array([]), False, 3)
+    path = tmp_path / 'Mush.release.pack'
+    path.write_bytes(writer.write()[1])
+
+    with pytest.raises(ValueError, match='not to be an encrypted'):
+        with zs_tools.RawSARC.fromFile(path) as sarc:
+            nisasyst.NisasystContainer('Mush/Octa2DMapInfo.byml', sarc.files['Mush/Octa2DMapInfo.byml'])
+
+
+@pytest.mark.parametrize('endianness', [oead.Endianness.Little, oead.Endianness.Big])
+def testRawSARCReplacedFiles(endianness):
+    data = makeSARC(endianness, [10, 200, 3000, 40])
+    expected = {file.name: bytes(file.data) for file in oead.Sarc(data).get_files()}
+    expected['Dir/File01.bin'] = b'shorter'
+    expected['Dir/File02.bin'] = bytes(range(256)) * 50
+
+    with zs_tools.RawSARC(data) as sarc:
+        alignments = list(sarc.alignments)
+        for name in ('Dir/File01.bin', 'Dir/File02.bin'):
+            sarc.files[name] = expected[name]
+        repacked = sarc.repack()
+
+    reader = oead.Sarc(repacked)
+    assert reader.get_endianness() == endianness
+    assert {file.name: bytes(file.data) for file in reader.get_files()} == expected
+    # every file keeps the alignment of its vanilla offset, even after the files before it changed size
+    with zs_tools.RawSARC(repacked) as sarc:
+        assert all(alignment >= vanilla for alignment, vanilla in zip(sarc.alignments, alignments))
+
+
+def testRawSARCWritesChunks(tmp_path):
+    data = makeSARC(oead.Endianness.Little, [10, 0x2001, 3000, 5])
+    source = tmp_path / 'Source.pack'
+    source.write_bytes(data)
+
+    with zs_tools.RawSARC.fromFile(source) as sarc:
+        sarc.files['Dir/File02.bin'] = b'replaced'
+        # the archive is streamed a header, padding, or file at a time, never as one buffer
+        assert max(len(chunk) for chunk in sarc.chunks()) == 0x2001
+        with open(tmp_path / 'Out.pack', 'wb') as f:
+            sarc.write(f)
+        repacked = sarc.repack()
+
+    assert (tmp_path / 'Out.pack').read_bytes() == repacked
+    assert bytes(oead.Sarc(repacked).get_file('Dir/File02.bin').data) == b'replaced'
@@ -0,0 +1,100 @@
+"""Tests for staging a seed folder and swapping it into place"""
+
+from RandomizerCore.Tools.manifest import newDigest
+from RandomizerCore.Tools.run_report import RunReport
+from RandomizerCore.Tools.staged_output import StagedOutput, waitForRemovals
+import pytest
+
+
+def makeSeed(root, files: dict) -> None:
+    for name, data in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_bytes(data)
+
+
+def contents(root) -> dict:
+    return {file.relative_to(root).as_posix(): file.read_bytes() for file in root.rglob('*') if file.is_file()}
+
+
+def leftovers(root) -> list:
+    """Returns the staging and old folders that are still next to the seed folder"""
+
+    waitForRemovals()
+    return [folder.name for folder in root.parent.iterdir() if folder.name.startswith(f".{root.name}.")]
+
+
+def testCommitReplacesSeedFolder(tmp_path):
+    root = tmp_path / 'seed'
+    makeSeed(root, {'spoiler.yml': b'old log', 'romfs/Pack/Map.pack': b'old map', 'romfs/Pack/Mush.release.pack': b'old mush'})
+
+    output = StagedOutput(root, RunReport())
+    output.write('romfs/Pack/Map.pack', b'new map')
+    output.commit(keep=['romfs/Pack/Mush.release.pack'])
+
+    # files directly in the seed folder and reused files are kept, everything else comes from the new run
+    assert contents(root) == {'spoiler.yml': b'old log', 'romfs/Pack/Map.pack': b'new map', 'romfs/Pack/Mush.release.pack': b'old mush'}
+    assert leftovers(root) == []
+
+
+def testCommitDropsFilesNotKept(tmp_path):
+    root = tmp_path / 'seed'
+    makeSeed(root, {'romfs/Pack/Map.pack': b'old map', 'romfs/Pack/Old.pack': b'old'})
+
+    output = StagedOutput(root, RunReport())
+    output.write('romfs/Pack/Map.pack', b'new map')
+    output.commit(keep=[])
+    assert contents(root) == {'romfs/Pack/Map.pack': b'new map'}
+
+
+def testDigests(tmp_path):
+    output = StagedOutput(tmp_path / 'seed', RunReport())
+    output.write('a.bin', b'data')
+    output.flush()
+    digest = newDigest()
+    digest.update(b'data')
+    assert output.digests == {'a.bin': digest.hexdigest()}
+    output.discard()
+
+
+def testDiscardKeepsSeedFolder(tmp_path):
+    root = tmp_path / 'seed'
+    makeSeed(root, {'romfs/Pack/Map.pack': b'old map'})
+
+    output = StagedOutput(root, RunReport())
+    output.write('romfs/Pack/Map.pack', b'new map')
+    output.flush()
+    output.discard()
+    assert contents(root) == {'romfs/Pack/Map.pack': b'old map'}
+    assert leftovers(root) == []
+
+
+def testCancelledCommitDoesNothing(tmp_path):
+    root = tmp_path / 'seed'
+    makeSeed(root, {'romfs/Pack/Map.pack': b'old map'})
+
+    output = StagedOutput(root, RunReport())
+    output.write('romfs/Pack/Map.pack', b'new map')
+    output.cancel()
+    output.commit()
+    output.discard()
+    assert contents(root) == {'romfs/Pack/Map.pack': b'old map'}
+    assert leftovers(root) == []
+
+
+def testWriteErrorRaisedOnFlush(tmp_path):
+    output = StagedOutput(tmp_path / 'seed', RunReport())
+    output.write('a.bin', 'not bytes')
+    with pytest.raises(TypeError):
+        output.flush()
+    output.discard()
+
+
+def testLeftoverStagingRemoved(tmp_path):
+    root = tmp_path / 'seed'
+    makeSeed(tmp_path, {'.seed.staging-crashed/romfs/Pack/Map.pack': b'partial'})
+
+    output = StagedOutput(root, RunReport())
+    output.write('romfs/Pack/Map.pack', b'new map')
+    output.commit()
+    assert contents(root) == {'romfs/Pack/Map.pack': b'new map'}
+    assert leftovers(root) == []